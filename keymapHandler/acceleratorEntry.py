@@ -8,7 +8,7 @@ class AcceleratorEntry(wx.AcceleratorEntry):
 	#ショートカットキーの一致によって判定され、登録されたメニューコマンドの一致は無視される
 	#refをstrで保持する
 
-	def __init__(self,flags,key,cmd,ref_ame=""):
+	def __init__(self,flags,key,cmd,ref_name=""):
 		super().__init__(flags,key,cmd)
 		self.ref_name=ref_name
 
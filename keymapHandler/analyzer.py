@@ -0,0 +1,134 @@
+# analyzer
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#読み込み済みキーマップの静的解析
+
+import argparse
+import builtins
+import json
+import sys
+
+from .keyString import splitKeyString, normalizeKey, keyToChord
+
+
+class KeymapReport():
+	"""analyze の結果を保持する"""
+
+	def __init__(self):
+		self.shadowed=[]			#(identifier,キー,[ref,...]) 同一ビュー内で複数のrefに割り当てられたキー
+		self.partialRefs={}			#ref→割り当てられていないビューのリスト。複数のビューに存在するが全てのビューには無いもの
+		self.disabled=[]			#(identifier,ref,キー) フィルタの無効パターンに該当する割り当て
+		self.collisions=[]			#(キー,{identifier:[ref,...]}) 異なるビューで異なるrefに割り当てられたキー
+		self.rejected={}			#identifier→{ref:キー} 読み込み時に追加できなかったもの
+
+	def HasProblems(self):
+		"""ビュー間の衝突以外の問題が1つでも検出されていればTrueを返す"""
+		return bool(self.shadowed or self.disabled or self.rejected)
+
+	def toDict(self):
+		return {
+			"shadowed":[{"identifier":i,"key":k,"refs":r} for i,k,r in self.shadowed],
+			"partialRefs":self.partialRefs,
+			"disabled":[{"identifier":i,"ref":r,"key":k} for i,r,k in self.disabled],
+			"collisions":[{"key":k,"views":v} for k,v in self.collisions],
+			"rejected":self.rejected,
+		}
+
+
+def analyze(handler,filter=None):
+	"""
+		KeymapHandlerの map を1回走査し、KeymapReportを返す。
+		filterを指定しない場合、handlerに設定されたフィルタの無効パターンで検査する。
+		GetError と異なり、handler.errors の内容はクリアしない。
+	"""
+	if filter is None:
+		filter=handler.filter
+	disabled=set()
+	if filter:
+		disabled={frozenset(name.upper() for name in pattern) for pattern in filter.disablePattern}
+
+	report=KeymapReport()
+	chordIndex={}				#(flags,keycode)→(正規化したキー文字列,{identifier:[ref,...]})
+	refViews={}					#ref→割り当てのあるビューのset
+	for identifier,refs in handler.map.items():
+		for ref,keyString in refs.items():
+			refViews.setdefault(ref,set()).add(identifier)
+			for key in splitKeyString(keyString):
+				chord=keyToChord(key)
+				if chord is None:
+					continue
+				name=normalizeKey(key)
+				if frozenset(name.split("+")) in disabled:
+					report.disabled.append((identifier,ref,name))
+				views=chordIndex.setdefault(chord,(name,{}))[1]
+				views.setdefault(identifier,[]).append(ref)
+
+	for name,views in chordIndex.values():
+		allRefs=set()
+		for identifier,refs in views.items():
+			if len(refs)>1:
+				report.shadowed.append((identifier,name,refs))
+			allRefs.update(refs)
+		if len(views)>1 and len(allRefs)>1:
+			report.collisions.append((name,views))
+
+	viewCount=len(handler.map)
+	for ref,views in refViews.items():
+		if 1<len(views)<viewCount:
+			report.partialRefs[ref]=sorted(handler.map.keys()-views)
+
+	for identifier,errors in handler.errors.items():
+		if errors:
+			report.rejected[identifier]=dict(errors)
+	return report
+
+
+def main(argv=None):
+	"""INIファイルのキーマップを解析する。問題が検出された場合は終了コード1を返す"""
+	from .keymapHandler import KeymapHandler, OK
+	from .keyFilter import KeyFilter
+
+	parser=argparse.ArgumentParser(prog="keymapHandler.analyzer",description="keymap static analyzer")
+	parser.add_argument("files",nargs="+",help="keymap ini files. later files are added on top of earlier ones.")
+	parser.add_argument("--sections",nargs="*",help="sections to read")
+	parser.add_argument("--filter",choices=["none","user","system"],default="none",help="KeyFilter whose disable patterns are reported")
+	parser.add_argument("--allow-confrict",action="store_true",help="register duplicate keys instead of rejecting them")
+	parser.add_argument("--json",action="store_true",help="print the report as json")
+	args=parser.parse_args(argv)
+
+	#KeyFilterのエラーメッセージは翻訳関数 _ を使うので、アプリケーション外で実行する場合は何もしない関数を用意する
+	if not hasattr(builtins,"_"):
+		builtins._=lambda message:message
+	filter=None
+	if args.filter!="none":
+		filter=KeyFilter().SetDefault(False,args.filter=="system")
+	permitConfrict=(lambda checkList,log:True) if args.allow_confrict else None
+	#フィルタを読み込み時に適用すると、無効パターンに該当するものがrejectedに入ってしまうので、読み込み後にanalyzeで検査する
+	handler=KeymapHandler(permitConfrict=permitConfrict,log_prefix="analyzer")
+	sections={s.upper() for s in args.sections} if args.sections else None
+	for fileName in args.files:
+		if handler.addFile(fileName,sections)!=OK:
+			print("cannot read %s" % fileName,file=sys.stderr)
+			return 2
+
+	report=analyze(handler,filter)
+	if args.json:
+		json.dump(report.toDict(),sys.stdout,ensure_ascii=False,indent=2)
+		print()
+	else:
+		for identifier,name,refs in report.shadowed:
+			print("shadowed: [%s] %s -> %s" % (identifier,name,", ".join(refs)))
+		for identifier,ref,name in report.disabled:
+			print("disabled: [%s] %s=%s" % (identifier,ref,name))
+		for identifier,errors in report.rejected.items():
+			for ref,key in errors.items():
+				print("rejected: [%s] %s=%s" % (identifier,ref,key))
+		for name,views in report.collisions:
+			print("collision: %s -> %s" % (name," ".join("[%s]%s" % (i,",".join(r)) for i,r in views.items())))
+		for ref,views in report.partialRefs.items():
+			print("partial: %s is not bound in %s" % (ref,", ".join(views)))
+	return 1 if report.HasProblems() else 0
+
+
+if __name__=="__main__":
+	sys.exit(main())
@@ -0,0 +1,133 @@
+# ConfrictPolicy
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#キーの重複をどのように扱うかを宣言的に指定するためのポリシー
+
+# 重複時の動作
+ALLOW=0				#全てのrefで共有する
+DENY=1				#最初に登録されたものを残し、以降のものはエラーとして記録する
+FIRST_WINS=2		#最初に登録されたものを残し、以降のものは黙って捨てる
+LAST_WINS=3			#最後に登録されたものを残し、それ以前のものは黙って捨てる
+
+_actions={ALLOW,DENY,FIRST_WINS,LAST_WINS}
+
+class ConfrictPolicy():
+	"""
+		キーの重複の解決方法を定めるルールの集合。
+		重複したrefのうち2つ以上を含むALLOWのルールがあれば、最初に追加されたものに含まれるref同士はキーを共有する。
+		ALLOWのルールは共有を許可するだけで、グループ外のrefより優先されることはない。
+		グループ外のrefとの重複や、グループが無い場合の重複には、重複したrefの全てを含むALLOW以外のルールのうち、最初に追加されたものが適用される。
+		該当するルールがない場合はdefaultが適用される。
+	"""
+
+	def __init__(self,default=DENY):
+		if default not in _actions:
+			raise ValueError("unknown action %s" % default)
+		self.default=default
+		self.rules=[]				#(action,refのfrozenset または全てに一致するNone)
+		self._compiled=None
+
+	def AddRule(self,action,refs=None):
+		"""
+			refsに含まれるref同士の重複にactionを適用するルールを追加する。
+			refsを省略すると、全ての重複に一致するルールとなる。
+		"""
+		if action not in _actions:
+			raise ValueError("unknown action %s" % action)
+		if refs is not None:
+			if type(refs)==str:
+				refs=[refs]
+			refs=frozenset(ref.upper() for ref in refs)
+		self.rules.append((action,refs))
+		self._compiled=None
+		return self
+
+	def Allow(self,refs):
+		"""refsに含まれるref同士であれば、同じキーの共有を許可する"""
+		return self.AddRule(ALLOW,refs)
+
+	def Deny(self,refs=None):
+		return self.AddRule(DENY,refs)
+
+	def FirstWins(self,refs=None):
+		return self.AddRule(FIRST_WINS,refs)
+
+	def LastWins(self,refs=None):
+		return self.AddRule(LAST_WINS,refs)
+
+	def Compile(self):
+		"""ref→そのrefを含むルール番号のsetの索引を作る。ルール変更後の最初のResolveで自動的に呼ばれる"""
+		byRef={}
+		wildcards=[]
+		for i,(action,refs) in enumerate(self.rules):
+			if refs is None:
+				wildcards.append(i)
+				continue
+			for ref in refs:
+				byRef.setdefault(ref,set()).add(i)
+		self._compiled=(byRef,wildcards)
+
+	def Resolve(self,refs):
+		"""
+			同じキーが割り当てられたrefのリスト(登録順)を、(キーを残すrefのリスト,エラーとして記録するrefのリスト)に分ける。
+			キーを共有するグループは1つのrefと同様に扱い、重複したrefの全てを含むALLOW以外のルール(無ければdefault)の動作を適用する。
+			DENY・FIRST_WINSでは最初に登録されたrefを含むものが、LAST_WINSでは最後に登録されたrefを含むものがキーを残す。
+			そのため結果は登録順に依存する。例えば、グループ外のrefが先にキーを持っていると、後から追加したグループのrefはDENYでは拒否される。
+		"""
+		if self._compiled is None:
+			self.Compile()
+		groups=self._GetAllowedGroups(refs)
+		if refs[0] in groups and all(ref in groups[refs[0]] for ref in refs):
+			return list(refs),[]
+		action=self._GetAction(refs,not groups)
+		if action==ALLOW:
+			return list(refs),[]
+		winner=refs[-1] if action==LAST_WINS else refs[0]
+		if winner in groups:
+			kept=[ref for ref in refs if ref in groups[winner]]
+		else:
+			kept=[winner]
+		return kept,([ref for ref in refs if ref not in kept] if action==DENY else [])
+
+	def _GetAllowedGroups(self,refs):
+		"""
+			refsを、キーを共有できるグループに分け、ref→そのrefを含むグループのsetのdictを返す。グループに属さないrefは含まない。
+			ALLOWのルールを追加された順に調べ、まだグループに属していないrefを2つ以上含むものをグループとする。
+		"""
+		byRef,wildcards=self._compiled
+		wildcard=next((i for i in wildcards if self.rules[i][0]==ALLOW),None)
+		members={}				#ルール番号→そのルールに含まれるrefのリスト
+		for ref in dict.fromkeys(refs):
+			for i in byRef.get(ref,()):
+				if self.rules[i][0]==ALLOW and (wildcard is None or i<wildcard):
+					members.setdefault(i,[]).append(ref)
+		groups={}
+		for i in sorted(members):
+			group={ref for ref in members[i] if ref not in groups}
+			if len(group)>1:
+				groups.update((ref,group) for ref in group)
+		if wildcard is not None:
+			group={ref for ref in refs if ref not in groups}
+			if len(group)>1:
+				groups.update((ref,group) for ref in group)
+		return groups
+
+	def _GetAction(self,refs,allow):
+		"""refsの全てを含むルールのうち、最初に追加されたものの動作を返す。allowがFalseの場合はALLOWのルールを無視する"""
+		byRef,wildcards=self._compiled
+		candidates=None
+		for ref in refs:
+			rules={i for i in byRef.get(ref,()) if allow or self.rules[i][0]!=ALLOW}
+			if not rules:
+				candidates=None
+				break
+			candidates=rules if candidates is None else candidates&rules
+			if not candidates:
+				break
+		best=min(candidates) if candidates else None
+		wildcard=next((i for i in wildcards if allow or self.rules[i][0]!=ALLOW),None)
+		if wildcard is not None and (best is None or wildcard<best):
+			best=wildcard
+		if best is None:
+			return self.default
+		return self.rules[best][0]
@@ -0,0 +1,409 @@
+# converter
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#キーマップのINIファイルと、他のエディタ風のキーバインド一覧(JSON/YAML)との相互変換
+#どの形式も1件ずつ読み書きするので、バインドの数に関わらず使用メモリはほぼ一定となる
+
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from .keyString import parseKey, normalizeKey, splitKeyString, modifierFlags
+from .str2key import str2key
+
+
+class KeyNameMap():
+	"""
+		このライブラリのキー名と、他のエディタでのキー名との対応表
+		namesに無いキーは、このライブラリのキー名を小文字にしたものとして扱う
+	"""
+
+	def __init__(self,names=None,modifiers=None,separator="+"):
+		self.modifiers={"CTRL":"ctrl","ALT":"alt","SHIFT":"shift","WINDOWS":"win"}
+		if modifiers:
+			self.modifiers.update(modifiers)
+		self.names=dict(names) if names else {}
+		self.separator=separator
+		self._reverseModifiers={v.lower():k for k,v in self.modifiers.items()}
+		self._reverseNames={v.lower():k for k,v in self.names.items()}
+
+	def ToForeign(self,key):
+		"""単一のキー文字列を、他のエディタでの表記に変換する。不正な指定の場合はNoneを返す"""
+		parsed=parseKey(key)
+		if parsed is None:
+			return None
+		modifiers,name=parsed
+		return self.separator.join([self.modifiers[m] for m in modifiers]+[self.names.get(name,name.lower())])
+
+	def FromForeign(self,text):
+		"""他のエディタでのキーの表記を、このライブラリのキー文字列に変換する。変換できない場合はNoneを返す"""
+		text=text.strip().lower()
+		if not text or " " in text:
+			#複数ストロークのキーには対応しない
+			return None
+		if text.endswith(self.separator+self.separator):
+			names=text[:-2].split(self.separator)+[self.separator]
+		else:
+			names=text.split(self.separator)
+		modifiers=[]
+		for name in names[:-1]:
+			if name not in self._reverseModifiers:
+				return None
+			modifiers.append(self._reverseModifiers[name])
+		name=self._reverseNames.get(names[-1],names[-1].upper())
+		if name not in str2key:
+			return None
+		return normalizeKey("+".join(modifiers+[name]))
+
+
+#そのままの名前で扱うマッピング
+IDENTITY=KeyNameMap(modifiers={m:m for m in modifierFlags},names={k:k for k in str2key})
+
+#VS Code 風のキー名
+VSCODE=KeyNameMap(names={
+	"RETURN":"enter",
+	"BACK":"backspace",
+	"LEFTARROW":"left",
+	"UPARROW":"up",
+	"RIGHTARROW":"right",
+	"DOWNARROW":"down",
+	"APPLICATIONS":"contextmenu",
+	"PAUSE":"pausebreak",
+	"NUMPAD_ADD":"numpad_add",
+	"NUMPAD_SUBTRACT":"numpad_subtract",
+	"NUMPAD_MULTIPLY":"numpad_multiply",
+	"NUMPAD_DIVIDE":"numpad_divide",
+	"NUMPAD_DECIMAL":"numpad_decimal",
+	"NUMPAD_SEPARATOR":"numpad_separator",
+	"VOLUME_UP":"audiovolumeup",
+	"VOLUME_DOWN":"audiovolumedown",
+	"VOLUME_MUTE":"audiovolumemute",
+	"MEDIA_NEXT":"mediatracknext",
+	"MEDIA_BACK":"mediatrackprevious",
+	"MEDIA_PLAY":"mediaplaypause",
+	"MEDIA_STOP":"mediastop",
+})
+
+_maxRuns=64			#WriteIniが同時に開く一時ファイルの最大数
+
+keyNameMaps={
+	"identity":IDENTITY,
+	"vscode":VSCODE,
+}
+
+
+class KeymapConverter():
+	"""
+		(ビュー名,ref,キー文字列)の組を1件ずつ読み書きするコンバーター
+		Read系のメソッドはジェネレーターで、Write系のメソッドはそれを受け取って書き出す。
+	"""
+
+	def __init__(self,keyNameMap=VSCODE,keyField="key",refField="command",viewField="when",defaultView=None,log_prefix="app"):
+		"""
+			keyField,refField,viewFieldには、JSON/YAMLの各項目の名前を指定する。
+			defaultViewを指定すると、viewFieldの無い項目をそのビューのものとして扱う。指定しない場合は読み飛ばす。
+		"""
+		self.log=logging.getLogger("%s.converter" % log_prefix)
+		self.keyNameMap=keyNameMap
+		self.keyField=keyField
+		self.refField=refField
+		self.viewField=viewField
+		self.defaultView=defaultView
+		self.skipped=0				#変換できずに読み飛ばした件数
+
+	def ReadIni(self,f,sections=None):
+		"""
+			addFile と同じ形式のINIファイルを1行ずつ読む。
+			sectionsの扱いはaddFileと同じ。
+		"""
+		section=None
+		for line in f:
+			line=line.strip()
+			if not line or line[0] in "#;":
+				continue
+			if line[0]=="[" and line[-1]=="]":
+				section=line[1:-1].upper()
+				if (sections and (section not in sections)) or ((not sections) and "HOTKEY" in section):
+					section=None
+				continue
+			if section is None:
+				continue
+			delimiters=[i for i in (line.find("="),line.find(":")) if i>=0]
+			if not delimiters:
+				self._Skip("invalid line %s" % line)
+				continue
+			ref=line[:min(delimiters)].strip().upper()
+			for key in splitKeyString(line[min(delimiters)+1:].strip()):
+				yield (section,ref,key)
+
+	def WriteIni(self,bindings,f,runSize=100000):
+		"""
+			SaveFile と同じ形式でINIファイルに書き出す。
+			入力がビュー順・ref順に並んでいる必要はない。runSize件ずつ整列して一時ファイルに書き出し、それらを併合しながら出力するので、
+			メモリに保持するのは最大runSize件のバインドとビュー名の一覧のみで、同時に開く一時ファイルは最大_maxRuns個となる。
+			ビューは最初に現れた順に、refはビューごとに辞書順に、同じrefのキーは現れた順に並ぶ。
+			/ キーはキー文字列の区切りと区別できないので、読み飛ばす。
+		"""
+		views={}				#ビュー名→最初に現れた順番
+		runs=[]					#整列済みの(ビューの順番,ref,通し番号,キー)を1行ずつ書いた一時ファイル。refにはタブを含みうるので行末に置く
+		items=[]
+		try:
+			for seq,(view,ref,key) in enumerate(bindings):
+				parsed=parseKey(key)
+				if parsed is None or parsed[1]=="/" or "\n" in ref:
+					self._Skip("invalid key in %s %s" % (view,ref))
+					continue
+				items.append((views.setdefault(view,len(views)),ref,seq,"+".join(parsed[0]+(parsed[1],))))
+				if len(items)>=runSize:
+					self._AddRun(runs,items)
+					items=[]
+			items.sort()
+			names=list(views)
+			current=None
+			merged=heapq.merge(items,*(self._ReadRun(run) for run in runs))
+			for (viewIndex,ref),group in itertools.groupby(merged,key=lambda item:item[:2]):
+				if viewIndex!=current:
+					if current is not None:
+						f.write("\n")
+					f.write("[%s]\n" % names[viewIndex])
+					current=viewIndex
+				f.write("%s = %s\n" % (ref.lower(),"/".join(item[3] for item in group)))
+			if current is not None:
+				f.write("\n")
+		finally:
+			for run in runs:
+				run.close()
+
+	def _AddRun(self,runs,items):
+		"""itemsを整列して一時ファイルに書き出し、runsに加える。一時ファイルが_maxRuns個になったら1つに併合する"""
+		items.sort()
+		runs.append(self._WriteRun(items))
+		if len(runs)>=_maxRuns:
+			run=self._WriteRun(heapq.merge(*(self._ReadRun(run) for run in runs)))
+			for old in runs:
+				old.close()
+			runs[:]=[run]
+
+	def _WriteRun(self,items):
+		run=tempfile.TemporaryFile("w+",encoding="UTF-8")
+		for item in items:
+			run.write("%d\t%d\t%s\t%s\n" % (item[0],item[2],item[3],item[1]))
+		run.seek(0)
+		return run
+
+	def _ReadRun(self,run):
+		for line in run:
+			viewIndex,seq,key,ref=line[:-1].split("\t",3)
+			yield (int(viewIndex),ref,int(seq),key)
+
+	def _ToRecord(self,view,ref,key):
+		"""書き出し用のdictを作る。変換できない場合はNoneを返す"""
+		foreign=self.keyNameMap.ToForeign(key)
+		if foreign is None:
+			self._Skip("invalid key in %s %s" % (view,ref))
+			return None
+		return {self.keyField:foreign,self.refField:ref,self.viewField:view}
+
+	def _FromRecord(self,record):
+		"""読み込んだdictから(ビュー名,ref,キー文字列)を作る。変換できない場合はNoneを返す"""
+		if not isinstance(record,dict):
+			self._Skip("invalid record %s" % str(record))
+			return None
+		ref=record.get(self.refField)
+		foreign=record.get(self.keyField)
+		view=record.get(self.viewField,self.defaultView)
+		if not ref or not foreign or not view or not isinstance(foreign,str):
+			self._Skip("incomplete record %s" % str(record))
+			return None
+		if ref.startswith("-"):
+			#割り当ての削除を意味するエントリは扱わない
+			self._Skip("removal record %s" % str(record))
+			return None
+		key=self.keyNameMap.FromForeign(foreign)
+		if key is None:
+			self._Skip("unsupported key %s" % foreign)
+			return None
+		return (view.upper(),ref.upper(),key)
+
+	def ReadJson(self,f,chunkSize=65536):
+		"""
+			キーバインドのdictを要素とするJSONの配列を、1要素ずつ読む。
+			要素の間にある // および /* */ 形式のコメントは読み飛ばす。
+		"""
+		decoder=json.JSONDecoder()
+		buf=""
+		pos=0
+		eof=False
+		started=False
+
+		def more():
+			nonlocal buf,pos,eof
+			chunk=f.read(chunkSize)
+			eof=not chunk
+			buf=buf[pos:]+chunk
+			pos=0
+
+		while True:
+			#空白・区切り・コメントを読み飛ばす
+			while pos<len(buf) and (buf[pos].isspace() or (started and buf[pos]==",")):
+				pos+=1
+			if len(buf)-pos<2 and not eof:
+				more()
+				continue
+			if pos>=len(buf):
+				if started:
+					raise ValueError("unexpected end of json")
+				return
+			if buf.startswith("//",pos) or buf.startswith("/*",pos):
+				terminator="\n" if buf[pos+1]=="/" else "*/"
+				end=buf.find(terminator,pos+2)
+				if end>=0:
+					pos=end+len(terminator)
+				elif eof:
+					pos=len(buf)
+				else:
+					more()
+				continue
+
+			if not started:
+				if buf[pos]!="[":
+					raise ValueError("json keybindings must be an array")
+				started=True
+				pos+=1
+				continue
+			if buf[pos]=="]":
+				return
+			try:
+				record,end=decoder.raw_decode(buf,pos)
+			except ValueError:
+				if eof:
+					raise
+				more()
+				continue
+			pos=end
+			binding=self._FromRecord(record)
+			if binding:
+				yield binding
+
+	def WriteJson(self,bindings,f):
+		"""キーバインドのdictを要素とするJSONの配列として書き出す"""
+		f.write("[")
+		first=True
+		for binding in bindings:
+			record=self._ToRecord(*binding)
+			if record is None:
+				continue
+			f.write("\n\t" if first else ",\n\t")
+			f.write(json.dumps(record,ensure_ascii=False))
+			first=False
+		f.write("\n]\n")
+
+	def ReadYaml(self,f):
+		"""WriteYamlが書き出す形式(値が文字列だけのdictのリスト)のYAMLを1要素ずつ読む"""
+		record=None
+		for line in f:
+			stripped=line.strip()
+			if not stripped or stripped[0]=="#":
+				continue
+			if stripped.startswith("- "):
+				if record is not None:
+					binding=self._FromRecord(record)
+					if binding:
+						yield binding
+				record={}
+				stripped=stripped[2:].strip()
+			if record is None or ":" not in stripped:
+				self._Skip("invalid line %s" % stripped)
+				continue
+			name,value=stripped.split(":",1)
+			value=value.strip()
+			if value.startswith("\""):
+				value=json.loads(value)
+			elif value.startswith("'") and value.endswith("'"):
+				value=value[1:-1].replace("''","'")
+			record[name.strip()]=value
+		if record is not None:
+			binding=self._FromRecord(record)
+			if binding:
+				yield binding
+
+	def WriteYaml(self,bindings,f):
+		"""キーバインドのdictのリストとしてYAML形式で書き出す"""
+		for binding in bindings:
+			record=self._ToRecord(*binding)
+			if record is None:
+				continue
+			prefix="- "
+			for name,value in record.items():
+				f.write("%s%s: %s\n" % (prefix,name,json.dumps(value,ensure_ascii=False)))
+				prefix="  "
+
+	def Convert(self,src,dst,srcFormat,dstFormat,sections=None):
+		"""
+			srcのファイルをsrcFormatの形式で読み、dstFormatの形式でdstに書き出す。
+			形式は "ini","json","yaml" のいずれか。読み飛ばした件数を返す。
+		"""
+		self.skipped=0
+		with open(src,encoding="UTF-8") as fin, open(dst,"w",encoding="UTF-8") as fout:
+			if srcFormat=="ini":
+				bindings=self.ReadIni(fin,sections)
+			elif srcFormat=="json":
+				bindings=self.ReadJson(fin)
+			elif srcFormat=="yaml":
+				bindings=self.ReadYaml(fin)
+			else:
+				raise ValueError("unknown format %s" % srcFormat)
+			if dstFormat=="ini":
+				self.WriteIni(bindings,fout)
+			elif dstFormat=="json":
+				self.WriteJson(bindings,fout)
+			elif dstFormat=="yaml":
+				self.WriteYaml(bindings,fout)
+			else:
+				raise ValueError("unknown format %s" % dstFormat)
+		return self.skipped
+
+	def _Skip(self,message):
+		self.log.warning(message)
+		self.skipped+=1
+
+
+_extensions={".ini":"ini",".json":"json",".yaml":"yaml",".yml":"yaml"}
+
+def main(argv=None):
+	"""キーマップを別の形式に変換する。読み飛ばしたものがあった場合は終了コード1を返す"""
+	parser=argparse.ArgumentParser(prog="keymapHandler.converter",description="keymap converter")
+	parser.add_argument("src")
+	parser.add_argument("dst")
+	parser.add_argument("--from",dest="srcFormat",choices=["ini","json","yaml"],help="guessed from the extension if omitted")
+	parser.add_argument("--to",dest="dstFormat",choices=["ini","json","yaml"],help="guessed from the extension if omitted")
+	parser.add_argument("--keymap",choices=sorted(keyNameMaps),default="vscode",help="key name mapping")
+	parser.add_argument("--key-field",default="key")
+	parser.add_argument("--ref-field",default="command")
+	parser.add_argument("--view-field",default="when")
+	parser.add_argument("--default-view",help="view used for records without the view field")
+	parser.add_argument("--sections",nargs="*",help="sections to read from an ini file")
+	args=parser.parse_args(argv)
+
+	srcFormat=args.srcFormat or _extensions.get(os.path.splitext(args.src)[1].lower())
+	dstFormat=args.dstFormat or _extensions.get(os.path.splitext(args.dst)[1].lower())
+	if not srcFormat or not dstFormat:
+		parser.error("cannot guess the format. use --from/--to")
+
+	logging.basicConfig(format="%(message)s")
+	converter=KeymapConverter(keyNameMaps[args.keymap],args.key_field,args.ref_field,args.view_field,args.default_view,"converter")
+	sections={s.upper() for s in args.sections} if args.sections else None
+	skipped=converter.Convert(args.src,args.dst,srcFormat,dstFormat,sections)
+	if skipped:
+		print("%d bindings were skipped" % skipped,file=sys.stderr)
+		return 1
+	return 0
+
+
+if __name__=="__main__":
+	sys.exit(main())
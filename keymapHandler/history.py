@@ -0,0 +1,77 @@
+# history
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#キーマップの編集履歴
+
+import collections
+
+
+class KeymapHistory():
+	"""
+		KeymapHandlerの編集履歴
+		1回の編集は、変更された(ビュー名,ref)→変更前のキー文字列(未割当ならNone)のdictとして記録する。
+		変更されなかったビューやrefの情報は持たないので、履歴の大きさは変更の量に比例する。
+	"""
+
+	def __init__(self,depth=100):
+		"""depthには、元に戻せる編集の最大数を指定する"""
+		self.undoStack=collections.deque(maxlen=depth)
+		self.redoStack=collections.deque(maxlen=depth)
+		self.position=0				#現在の状態の通し番号。編集・やり直しで1増え、元に戻すと1減る
+		self.savedPosition=0		#保存時の状態の通し番号。履歴から辿れなくなった場合はNone
+
+	def Record(self,delta):
+		"""新しい編集を記録する。やり直しの履歴は破棄される"""
+		if not delta:
+			return
+		if self.savedPosition is not None and self.savedPosition>self.position:
+			self.savedPosition=None
+		self.undoStack.append(delta)
+		self.redoStack.clear()
+		self.position+=1
+
+	def PopUndo(self):
+		"""元に戻す編集を取り出す。無い場合はNoneを返す"""
+		if not self.undoStack:
+			return None
+		self.position-=1
+		return self.undoStack.pop()
+
+	def PopRedo(self):
+		"""やり直す編集を取り出す。無い場合はNoneを返す"""
+		if not self.redoStack:
+			return None
+		self.position+=1
+		return self.redoStack.pop()
+
+	def PushUndo(self,delta):
+		"""やり直しを適用した結果の、元に戻すための情報を記録する"""
+		self.undoStack.append(delta)
+
+	def PushRedo(self,delta):
+		"""元に戻すを適用した結果の、やり直すための情報を記録する"""
+		self.redoStack.append(delta)
+
+	def CanUndo(self):
+		return len(self.undoStack)>0
+
+	def CanRedo(self):
+		return len(self.redoStack)>0
+
+	def MarkSaved(self):
+		self.savedPosition=self.position
+
+	def IsModified(self):
+		return self.savedPosition!=self.position
+
+	def GetStepsToSaved(self):
+		"""
+			保存時の状態までの手順数を返す。負の値は元に戻す回数、正の値はやり直す回数を表す。
+			履歴から辿れない場合はNoneを返す。
+		"""
+		if self.savedPosition is None:
+			return None
+		steps=self.savedPosition-self.position
+		if -steps>len(self.undoStack) or steps>len(self.redoStack):
+			return None
+		return steps
@@ -3,6 +3,16 @@
 #Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
 
 from .str2key import *
+from .keyString import modifierFlags, keyToChord
+
+#GetUsableChordsでの分類と、その判定に用いるテーブル。上から順に判定する
+keyCategories=[
+	("function",str2FunctionKey),
+	("inputControl",str2InputControlKey),
+	("standalone",str2StandaloneKey),
+	("special",str2SpecialKey),
+	("charactor",str2CharactorKey),
+]
 
 class KeyFilter:
 	"""
@@ -19,6 +29,8 @@ class KeyFilter:
 		self.enableKey=set()								#修飾キーとの組み合わせで利用可能
 		self.noShiftEnableKey=set()							#SHIFTキー以外の修飾キーとの組み合わせで利用可能(modifierKeyにSHIFTを指定していない場合は無視される)
 		self.disablePattern=[]								#無効なキーの組み合わせ
+		self._usableKeys=None								#GetUsableKeysのキャッシュ
+		self._catalog=None									#GetUsableChordsのキャッシュ。カテゴリ→[(キー文字列,(flags,keycode)),...]
 		self.AddDisablePattern("CTRL+ESCAPE")				#スタートメニュー
 		self.AddDisablePattern("CTRL+SHIFT+ESCAPE")			#タスクマネージャ
 		self.AddDisablePattern("CTRL+WINDOWS+RETURN")		#ナレーターの起動と終了
@@ -44,6 +56,7 @@ class KeyFilter:
 			ここでTrueを設定すると英数字や各種記号文字のキーを単体でショートカットキーとして利用可能になる。
 			ただし、各種コントロールのインクリメンタルサーチ等と競合するため、この設定は推奨されない。
 		"""
+		self.ClearCache()
 		self.modifierKey.add("CTRL")
 		self.modifierKey.add("ALT")
 		self.modifierKey.add("SHIFT")
@@ -96,6 +109,7 @@ class KeyFilter:
 			if not ptn in str2key:
 				raise ValueError(_("%s は存在しないキーです。") % (ptn))
 		self.disablePattern.append(set(patterns))
+		self.ClearCache()
 
 	def AddEnableKey(self,keys):
 		if type(keys)==str:
@@ -134,6 +148,7 @@ class KeyFilter:
 		self.modifierKey.discard(key)
 		self.noShiftEnableKey.discard(key)
 		target.add(key)
+		self.ClearCache()
 
 	def Check(self,keyString):
 		if keyString=="":
@@ -205,6 +220,58 @@ class KeyFilter:
 			return self.errorString
 
 	def GetUsableKeys(self):
-		ret=[]
-		ret.extend([*self.modifierKey,*self.functionKey,*self.enableKey,*self.noShiftEnableKey])
-		return ret
+		if self._usableKeys is None:
+			self._usableKeys=[*self.modifierKey,*self.functionKey,*self.enableKey,*self.noShiftEnableKey]
+		return list(self._usableKeys)
+
+	def ClearCache(self):
+		"""
+			GetUsableKeys・GetUsableChordsのキャッシュを破棄する。
+			Add系のメソッドやSetDefaultでは自動で呼ばれるので、各setを直接変更した場合にのみ呼び出す。
+		"""
+		self._usableKeys=None
+		self._catalog=None
+
+	def _GetCatalog(self):
+		if self._catalog is not None:
+			return self._catalog
+
+		#修飾キーの全ての組み合わせを、正規化した文字列と同じ順序で作る
+		modifierSets=[()]
+		for name in modifierFlags:
+			if name in self.modifierKey:
+				modifierSets+=[mods+(name,) for mods in modifierSets]
+
+		errorString=self.errorString
+		catalog={name:[] for name,table in keyCategories}
+		catalog["other"]=[]
+		for key in sorted(self.functionKey|self.enableKey|self.noShiftEnableKey,key=lambda k:str2key[k]):
+			if key=="/":
+				#キー文字列の区切りと区別できず、KeymapHandler.addで登録できないので含めない
+				continue
+			category="other"
+			for name,table in keyCategories:
+				if key in table:
+					category=name
+					break
+			for mods in modifierSets:
+				keyString="+".join(mods+(key,))
+				if self.Check(keyString):
+					catalog[category].append((keyString,keyToChord(keyString)))
+		self.errorString=errorString
+		self._catalog=catalog
+		return catalog
+
+	def GetUsableChords(self):
+		"""
+			このフィルタで設定可能な全てのキーの組み合わせを、カテゴリ→キー文字列のリストのdictで返す。
+			結果はフィルタが変更されるまでキャッシュされる。
+		"""
+		return {category:[keyString for keyString,chord in chords] for category,chords in self._GetCatalog().items()}
+
+	def GetFreeChords(self,boundChords):
+		"""
+			GetUsableChordsの結果から、boundChords((flags,keycode)の集合)に含まれるものを除いて返す。
+			KeymapHandler.GetFreeChordsから利用する。
+		"""
+		return {category:[keyString for keyString,chord in chords if chord not in boundChords] for category,chords in self._GetCatalog().items()}
@@ -0,0 +1,114 @@
+# keyLabel
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#キーマップに記述されたキー文字列を、メニュー等に表示するための文字列に変換する
+
+import sys
+
+from .keyString import parseKey, splitKeyString
+
+#言語ごとのキーの表示名。ここに無いキーは、キー名の _ を空白にして先頭だけ大文字にしたものになる
+labelTables={
+	"en":{
+		"CTRL":"Ctrl",
+		"ALT":"Alt",
+		"SHIFT":"Shift",
+		"WINDOWS":"Win",
+		"RETURN":"Enter",
+		"ESCAPE":"Esc",
+		"BACK":"Backspace",
+		"DELETE":"Del",
+		"INSERT":"Ins",
+		"PAGEUP":"PageUp",
+		"PAGEDOWN":"PageDown",
+		"LEFTARROW":"Left",
+		"UPARROW":"Up",
+		"RIGHTARROW":"Right",
+		"DOWNARROW":"Down",
+		"PRINTSCREEN":"PrintScreen",
+		"NUMPAD_ADD":"Num +",
+		"NUMPAD_SUBTRACT":"Num -",
+		"NUMPAD_MULTIPLY":"Num *",
+		"NUMPAD_DIVIDE":"Num /",
+		"NUMPAD_DECIMAL":"Num .",
+		"NUMPAD_EQUAL":"Num =",
+		**{"NUMPAD%d" % i:"Num %d" % i for i in range(10)},
+	},
+	"ja":{
+		"LEFTARROW":"←",
+		"UPARROW":"↑",
+		"RIGHTARROW":"→",
+		"DOWNARROW":"↓",
+		"SPACE":"スペース",
+		"APPLICATIONS":"アプリケーション",
+		**{"NUMPAD%d" % i:"テンキー%d" % i for i in range(10)},
+	},
+}
+
+#プラットフォームごとの表示名。言語ごとの表示名より優先される
+platformLabelTables={
+	"mac":{
+		"CTRL":"Cmd",
+		"ALT":"Option",
+		"RETURN":"Return",
+		"BACK":"Delete",
+	},
+}
+
+def _currentPlatform():
+	if sys.platform=="darwin":
+		return "mac"
+	if sys.platform.startswith("win"):
+		return "windows"
+	return "linux"
+
+
+class KeyLabelRenderer():
+	"""
+		キー文字列を表示用の文字列に変換する。
+		変換結果はキー文字列ごとにキャッシュされるので、生成後に設定を変更してはいけない。
+	"""
+
+	def __init__(self,locale="en",platform=None,allAlternatives=False,alternativeSeparator=", ",separator="+",names=None):
+		"""
+			localeとplatformで表示名のテーブルを選択する。platformを省略すると実行中のプラットフォームを用いる。
+			localeのテーブルに無いキーは、"en"のテーブルの表示名となる。
+			allAlternativesにTrueを指定すると、/区切りの全てのキーをalternativeSeparatorでつないで表示する。Falseの場合は最初のキーのみ表示する。
+			namesを指定すると、さらにその表示名で上書きする。
+		"""
+		self.names=dict(labelTables["en"])
+		self.names.update(labelTables.get(locale,{}))
+		self.names.update(platformLabelTables.get(platform or _currentPlatform(),{}))
+		if names:
+			self.names.update(names)
+		self.allAlternatives=allAlternatives
+		self.alternativeSeparator=alternativeSeparator
+		self.separator=separator
+		self.settingsKey=(frozenset(self.names.items()),allAlternatives,alternativeSeparator,separator)		#同じ表示になるrendererで等しくなる値。GetKeyLabelsのキャッシュに使う
+		self._cache={}
+
+	def Render(self,keyString):
+		"""/区切りのキー文字列を表示用の文字列に変換する"""
+		try:
+			return self._cache[keyString]
+		except KeyError:
+			pass
+		keys=splitKeyString(keyString)
+		if not self.allAlternatives:
+			keys=keys[:1]
+		label=self.alternativeSeparator.join(self.RenderKey(key) for key in keys)
+		self._cache[keyString]=label
+		return label
+
+	def RenderKey(self,key):
+		"""/区切りでない単一のキー文字列を表示用の文字列に変換する。解釈できない場合はそのまま返す"""
+		parsed=parseKey(key)
+		if parsed is None:
+			return key
+		return self.separator.join(self._GetName(name) for name in parsed[0]+(parsed[1],))
+
+	def _GetName(self,name):
+		try:
+			return self.names[name]
+		except KeyError:
+			return name.replace("_"," ").capitalize() if len(name)>1 else name
@@ -0,0 +1,51 @@
+# keyString
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#キーマップに記述されるショートカットキー文字列(CTRL+SHIFT+S/F12 など)の解析
+
+import wx
+
+from .str2key import str2key
+
+#修飾キーとフラグの対応。正規化した文字列はこの順に修飾キーを並べる
+modifierFlags={
+	"CTRL":wx.ACCEL_CTRL,
+	"ALT":wx.ACCEL_ALT,
+	"SHIFT":wx.ACCEL_SHIFT,
+	"WINDOWS":wx.MOD_WIN,
+}
+
+def splitKeyString(keyString):
+	"""/区切りのキー文字列を、個々のキーのリストに分割する。空の要素は無視する"""
+	return [key for key in keyString.split("/") if key!=""]
+
+def parseKey(key):
+	"""
+		/区切りでない単一のキー文字列を(修飾キーのタプル,キー名)に分解する。
+		修飾キーは modifierFlags の順に並べ替えられる。不正な指定の場合はNoneを返す。
+	"""
+	names=key.upper().split("+")
+	keyName=names[-1]
+	modifiers=set(names[:-1])
+	if len(modifiers)!=len(names)-1 or not modifiers<=modifierFlags.keys():
+		return None
+	if keyName not in str2key or keyName in modifierFlags:
+		return None
+	return (tuple(name for name in modifierFlags if name in modifiers),keyName)
+
+def normalizeKey(key):
+	"""単一のキー文字列を、修飾キーの順序を揃えた大文字の文字列に変換する。不正な指定の場合はNoneを返す"""
+	parsed=parseKey(key)
+	if parsed is None:
+		return None
+	return "+".join(parsed[0]+(parsed[1],))
+
+def keyToChord(key):
+	"""単一のキー文字列を、AcceleratorEntryの一致判定と同じ(flags,keycode)の組に変換する。不正な指定の場合はNoneを返す"""
+	parsed=parseKey(key)
+	if parsed is None:
+		return None
+	flags=0
+	for name in parsed[0]:
+		flags|=modifierFlags[name]
+	return (flags,str2key[parsed[1]])
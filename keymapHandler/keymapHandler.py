@@ -10,6 +10,11 @@ import configparser
 from . import menuItemsStore
 from .str2key import *
 from .acceleratorEntry import AcceleratorEntry
+from .keyString import keyToChord
+from .keyLabel import KeyLabelRenderer
+from .searchIndex import KeymapSearchIndex
+from .history import KeymapHistory
+from .usage import UsageCounter
 
 # errorCodes定数
 # 元々import errorCodesしていたのをひっぺがしている。追加していいが、変更してはいけない。
@@ -21,15 +26,29 @@ ACCESS_DENIED=4
 class KeymapHandler():
 	"""wxのアクセラレーターテーブルを生成"""
 
-	def __init__(self, dict=None, filter=None, permitConfrict=None, log_prefix="app"):
+	def __init__(self, dict=None, filter=None, permitConfrict=None, log_prefix="app", confrictPolicy=None):
 		"""
 			permitConfrictは(調べたいAcceleratorEntryのリスト,logger)を引数とし、booleanを返す任意の関数。
+			confrictPolicyにConfrictPolicyを指定すると、permitConfrictの代わりにこれを用いて、セクションの読み込み後にまとめて重複を解決する。
 		"""
 		self.log=logging.getLogger("%s.keymapHandler" % log_prefix)
+		self.log_prefix=log_prefix
 		self.errors={}
 		self.entries={}				#生成したAcceleratorEntry
 		self.map={}					#ref番号→ショートカットキーに変換
 		self.refMap={}				#キーの重複によりこのインスタンスで処理する必要のあるメニューと、そのとび先の本来のref
+		self.keyIndex={}			#ビュー→(flags,keycode)→そのキーが割り当てられたrefのリスト
+		self.confrictPolicy=confrictPolicy
+		self._pendingConfricts={}	#ビュー→confrictPolicyでの解決を待っている(flags,keycode)のset
+		self.versions={}			#ビュー→割り当てが変更されるたびに増える番号。キャッシュの有効性の確認に使う
+		self._labelCache={}			#ビュー→(versions上の番号,KeyLabelRenderer.settingsKey→(ref→表示用文字列))
+		self._defaultRenderer=None
+		self.searchIndex=None		#Searchの初回呼び出し時に作成し、以降はaddのたびに更新するKeymapSearchIndex
+		self.history=None			#EnableHistoryで作成するKeymapHistory
+		self._journal=None			#記録中の編集での、(ビュー,ref)→変更前のキー文字列
+		self.parents={}				#ビュー→親のビュー
+		self.usage=None				#EnableUsageCounterで作成するUsageCounter
+		self._compositeCache={}		#ビュー→((親をたどったビューと、それぞれのversionsの番号のタプル),AcceleratorEntryのリスト,wx.AcceleratorTable)
 		self.permitConfrict=permitConfrict
 		self.filter=filter			#指定の妥当性をチェックするフィルタ
 
@@ -41,19 +60,25 @@ class KeymapHandler():
 		"""
 			sectionsにlistまたはsetを指定すると、読み込むセクションを指定したもののみに制限できる。大文字で指定する。
 			sectionsを指定しない場合、セクション名にHOTKEYが含まれるものはスキップされる
+			既に存在するビューの割り当ては、読み込んだ内容で置き換えられる。
 		"""
 		read=configparser.ConfigParser()
 		read.read_dict(dict)
+		started=self._beginEdit()
 		for identifier in read.sections():
 			if (sections and (identifier.upper() not in sections)) or ((not sections) and "HOTKEY" in identifier):
 				self.log.debug("skip section %s" % identifier)
 				continue
 
 			self.log.debug("read section %s" % identifier)
-			self.entries[identifier]=[]
+			#履歴に記録されるよう、既存の割り当ての削除もself.mapを通して行う
+			if identifier.upper() in self.map:
+				self._removeRefs(identifier.upper(),list(self.map[identifier.upper()]))
 			for elem in read.items(identifier):
 				if elem[1]!="":						#空白のものは無視する
-					self.add(identifier,elem[0],elem[1])
+					self.add(identifier,elem[0],elem[1],resolve=False)
+			self.resolveConfricts(identifier)
+		self._endEdit(started)
 
 
 	def addFile(self, filename,sections=None):
@@ -77,6 +102,7 @@ class KeymapHandler():
 			return ret
 
 		#newKeysの情報を、検証しながらaddしていく
+		started=self._beginEdit()
 		for identifier in newKeys.sections():
 			if (sections and (identifier.upper() not in sections)) or ((not sections) and "HOTKEY" in identifier):
 				self.log.debug("skip section %s" % identifier)
@@ -85,7 +111,9 @@ class KeymapHandler():
 			self.log.debug("read section %s" % identifier)
 			for elem in newKeys.items(identifier):
 				if elem[1]!="":				#空白のものは無視する
-					self.add(identifier,elem[0],elem[1])
+					self.add(identifier,elem[0],elem[1],resolve=False)
+			self.resolveConfricts(identifier)
+		self._endEdit(started)
 		return OK
 
 	def SaveFile(self,fileName):
@@ -103,13 +131,15 @@ class KeymapHandler():
 		for section in self.entries.keys():
 			c.add_section(section)
 			for entry in self.entries[section]:
-				c[section][entry.refName]=self.map[section][entry.refName]
+				c[section][entry.get_ref_name()]=self.map[section][entry.get_ref_name()]
 		try:
-			with open(fileName,"w", encoding='UTF-8') as f: return c.write(f)
-			return OK
+			with open(fileName,"w", encoding='UTF-8') as f: c.write(f)
 		except Exception as e:
 			self.log.warning("keymap save (fn=%s) failed. %s" % (fileName,str(e)))
 			return ACCESS_DENIED
+		if self.history:
+			self.history.MarkSaved()
+		return OK
 
 	def GetError(self,identifier):
 		"""指定されたビューのエラー内容を返し、内容をクリアする"""
@@ -137,6 +167,61 @@ class KeymapHandler():
 		#end except
 
 
+	def GetKeyLabels(self,identifier,renderer=None):
+		"""
+			指定されたビューの全てのコマンドについて、ショートカットキーの表示用文字列をref→文字列のdictで取得する。
+			結果はビューの割り当てが変更されるまで、同じ設定のrendererごとにキャッシュされる。
+			rendererにはKeyLabelRendererを指定する。省略すると英語表記で最初のキーのみを表示する。
+		"""
+		identifier=identifier.upper()
+		renderer=renderer or self._getDefaultRenderer()
+		version=self.versions.get(identifier,0)
+		cached=self._labelCache.get(identifier)
+		if cached is None or cached[0]!=version:
+			#古い番号のものは全て破棄する
+			cached=(version,{})
+			self._labelCache[identifier]=cached
+		labels=cached[1].get(renderer.settingsKey)
+		if labels is None:
+			labels={ref:renderer.Render(keyString) for ref,keyString in self.map.get(identifier,{}).items()}
+			cached[1][renderer.settingsKey]=labels
+		return dict(labels)
+
+	def GetKeyLabel(self,identifier,ref,renderer=None):
+		"""
+			指定されたコマンドのショートカットキーの表示用文字列を取得する。
+			GetKeyStringと同様に、指定されたビューに無い場合は他のビューを検索する。
+		"""
+		renderer=renderer or self._getDefaultRenderer()
+		keyString=self.GetKeyString(identifier,ref)
+		if keyString is None:
+			return None
+		return renderer.Render(keyString)
+
+	def _getDefaultRenderer(self):
+		if self._defaultRenderer is None:
+			self._defaultRenderer=KeyLabelRenderer()
+		return self._defaultRenderer
+
+	def Search(self,query,identifier=None,limit=20):
+		"""
+			ref・ビュー名・ショートカットキーからコマンドを検索し、(ビュー名,ref,キー文字列のタプル)のリストを一致度の高い順に返す。
+			CTRL+K のようにキーとして解釈できる場合は、そのキーが割り当てられているものが最上位になる。
+			identifierを指定すると、そのビューのものに限定する。
+			BuildSearchIndexを呼んでいない場合は、初回の呼び出し時に索引を作成する。
+		"""
+		if self.searchIndex is None:
+			self.BuildSearchIndex()
+		return self.searchIndex.Search(query,identifier.upper() if identifier else None,limit)
+
+	def BuildSearchIndex(self):
+		"""
+			Searchで使う索引を作成する。以降はaddのたびに更新される。
+			バインドの数が多いと時間がかかるので、起動時やアイドル時に呼んでおくと、最初の検索を待たせずに済む。
+		"""
+		self.searchIndex=KeymapSearchIndex()
+		self.searchIndex.Build(self.map)
+
 	def GetTable(self, identifier):
 		"""
 			アクセラレーターテーブルを取得する。
@@ -148,6 +233,80 @@ class KeymapHandler():
 			return wx.AcceleratorTable([])
 
 
+	def SetParent(self,identifier,parent):
+		"""
+			ビューの親を設定する。親のビューのショートカットは、GetCompositeTable等で子のビューのものと合成される。
+			parentにNoneを指定すると、親の設定を解除する。親子関係が循環する場合はValueErrorとなる。
+		"""
+		identifier=identifier.upper()
+		if parent is None:
+			self.parents.pop(identifier,None)
+			return
+		parent=parent.upper()
+		if identifier in self.GetChain(parent):
+			raise ValueError("%s is an ancestor of %s." % (identifier,parent))
+		self.parents[identifier]=parent
+
+	def GetChain(self,identifier):
+		"""ビューと、その親・祖先のビューのリストを、近い順に返す"""
+		chain=[identifier.upper()]
+		while chain[-1] in self.parents:
+			chain.append(self.parents[chain[-1]])
+		return chain
+
+	def _getComposite(self,identifier):
+		chain=self.GetChain(identifier)
+		key=tuple((view,self.versions.get(view,0)) for view in chain)
+		cached=self._compositeCache.get(chain[0])
+		if cached and cached[0]==key:
+			return cached
+
+		#子のビューで使われているキーは、親のビューのものを無視する
+		entries=[]
+		taken=set()
+		for view in chain:
+			level=[entry for entry in self.entries.get(view,[]) if (entry.GetFlags(),entry.GetKeyCode()) not in taken]
+			taken.update((entry.GetFlags(),entry.GetKeyCode()) for entry in level)
+			entries.extend(level)
+		cached=(key,entries,wx.AcceleratorTable(entries))
+		self._compositeCache[chain[0]]=cached
+		return cached
+
+	def GetCompositeEntries(self,identifier):
+		"""
+			ビューと、その祖先のビューのエントリーを合成したリストを返す。
+			同じキーが複数のビューにある場合は、最も近いビューのものが優先される。
+		"""
+		return list(self._getComposite(identifier)[1])
+
+	def GetCompositeTable(self,identifier):
+		"""
+			GetCompositeEntriesのエントリーによるアクセラレーターテーブルを取得する。
+			作成したテーブルは、親子関係やいずれかのビューの割り当てが変更されるまで再利用される。
+		"""
+		return self._getComposite(identifier)[2]
+
+	def Precompute(self,identifiers=None):
+		"""指定したビュー(省略時は全てのビュー)の合成テーブルを作成しておく"""
+		for identifier in identifiers or list(self.entries):
+			self._getComposite(identifier)
+
+	def SetComposite(self,identifier,window):
+		"""合成したアクセラレーターテーブルを指定されたウィンドウに登録する"""
+		return window.SetAcceleratorTable(self.GetCompositeTable(identifier))
+
+	def BindFocus(self,control,identifier,target=None):
+		"""
+			controlがフォーカスを得たとき、identifierのビューの合成テーブルをtargetに登録するようにする。
+			targetを省略すると、controlのトップレベルウィンドウに登録する。
+		"""
+		identifier=identifier.upper()
+		self._getComposite(identifier)
+		def onFocus(event):
+			self.SetComposite(identifier,target or control.GetTopLevelParent())
+			event.Skip()
+		control.Bind(wx.EVT_SET_FOCUS,onFocus)
+
 	def GetEntries(self,identifier):
 		"""
 			登録されているエントリーの一覧を取得する。
@@ -155,6 +314,40 @@ class KeymapHandler():
 		"""
 		return self.entries[identifier.upper()]
 
+	def Lookup(self,identifier,flags,keycode):
+		"""
+			修飾キーのフラグとキーコードから、割り当てられているrefのタプルを取得する。
+			wx.KeyEventの GetModifiers() と GetKeyCode() の値をそのまま指定できる。
+			アクセラレーターテーブルを経由しないため、EVT_CHAR_HOOK を独自に処理するコントロールで利用する。
+			割り当てがない場合は空のタプルを返す。
+		"""
+		try:
+			return tuple(self.keyIndex[identifier.upper()][(flags,keycode)])
+		except KeyError:
+			return ()
+
+	def LookupEvent(self,identifier,event):
+		"""wx.KeyEventに割り当てられているrefのタプルを取得する"""
+		return self.Lookup(identifier,event.GetModifiers(),event.GetKeyCode())
+
+	def LookupMany(self,identifier,keys):
+		"""
+			(flags,keycode)の組のリストをまとめて解決し、Lookupの結果のリストを返す。
+			記録したキー入力の再生などで利用する。
+		"""
+		get=self.keyIndex.get(identifier.upper(),{}).get
+		return [tuple(get(key,())) for key in keys]
+
+	def GetFreeChords(self,identifier,filter=None):
+		"""
+			指定したビューで、filterが許可していて、かつまだ割り当てられていないキーの一覧を、カテゴリ→キー文字列のリストのdictで返す。
+			filterを省略すると、このインスタンスのフィルタを用いる。
+		"""
+		filter=filter or self.filter
+		if not filter:
+			raise ValueError("filter is not specified.")
+		return filter.GetFreeChords(self.keyIndex.get(identifier.upper(),{}))
+
 	def Set(self,identifier,window,eventHandler=None):
 		"""
 			アクセラレータテーブルを指定されたウィンドウに登録する
@@ -163,22 +356,61 @@ class KeymapHandler():
 			eventHandlerを指定すると、EVT_MENUをBindする
 		"""
 		if eventHandler:
+			if self.usage:
+				eventHandler=self.usage.Wrap(identifier.upper(),eventHandler,self.refMap)
 			window.Bind(wx.EVT_MENU,eventHandler)
 		return window.SetAcceleratorTable(self.GetTable(identifier))
 
+	def EnableUsageCounter(self,fileName=None,flushEvery=1000):
+		"""
+			コマンドの実行回数の記録を開始する。
+			以降にSetでeventHandlerを指定すると、EVT_MENUのたびに回数が記録される。
+			キーを共有するrefのグループのrefは、どのコマンドが実行されたか分からないので記録しない。
+			eventHandlerでグループのrefを元のrefに振り分けた場合は、RecordUsageで記録する。
+			fileNameを指定すると、以前の記録を読み込み、flushEvery回ごとにそのファイルへ書き出す。
+		"""
+		self.usage=UsageCounter(fileName,flushEvery,self.log_prefix)
+
+	def RecordUsage(self,identifier,ref):
+		"""
+			Setを経由せずにコマンドを実行した場合に、その実行回数を記録する。
+			refにはメニューのref(数値)を指定する。キーを共有するrefのグループのrefは記録しない。
+		"""
+		if self.usage and ref not in self.refMap:
+			self.usage.Record(identifier.upper(),ref)
+
+	def GetTopCommands(self,identifier,n=10):
+		"""指定されたビューで実行回数の多いコマンドを、(コマンド名,回数)のリストで最大n件返す"""
+		if not self.usage:
+			return []
+		return self.usage.GetTop(identifier.upper(),n)
+
+	def FlushUsage(self):
+		"""実行回数の記録をファイルに書き出す。アプリケーションの終了時などに呼び出す"""
+		if self.usage:
+			return self.usage.Flush()
+		return False
+
 	def makeEntry(self,*pArgs, **kArgs):
-		return makeEntry(*pArgs,*kArgs)
+		return make_entry(*pArgs,**kArgs)
 
-	def add(self,identifier,ref,key):
-		"""重複をチェックしながらキーマップにショートカットを追加する"""
+	def add(self,identifier,ref,key,resolve=True):
+		"""
+			重複をチェックしながらキーマップにショートカットを追加する
+			confrictPolicyが設定されている場合、重複したキーはいったんそのまま登録される。
+			resolveにFalseを指定すると、その解決をresolveConfricts の呼び出しまで保留する。
+		"""
 		#refとidentifierは大文字・小文字の区別をしないので大文字に統一
 		ref=ref.upper()
 		identifier=identifier.upper()
 
+		started=self._beginEdit()
+
 		#identifierが新規だった場合、self.mapとself.entriesにセクション作成
 		if not identifier in self.map.keys():
 			self.entries[identifier]=[]
 			self.map[identifier]={}
+		index=self.keyIndex.setdefault(identifier,{})
 
 		#エントリーの作成・追加
 		for e in key.split("/"):
@@ -186,12 +418,17 @@ class KeymapHandler():
 			if entry==False:
 				self.addError(identifier,ref,key,"make entry failed")
 				continue
+			chord=(entry.GetFlags(),entry.GetKeyCode())
 
 			#キーの重複確認
 			checkList=[]		#要確認リスト
-			for i in self.entries[identifier]:
-				if entry==i:
-					checkList.append(i)
+			if index.get(chord):
+				if self.confrictPolicy:
+					self._pendingConfricts.setdefault(identifier,set()).add(chord)
+				else:
+					for i in self.entries[identifier]:
+						if entry==i:
+							checkList.append(i)
 			if checkList:
 					checkList.append(entry)
 					if self.permitConfrict and self.permitConfrict(checkList,self.log):
@@ -204,17 +441,259 @@ class KeymapHandler():
 			#GetKeyStringに備えてself.mapに追加
 			if ref in self.map[identifier]:
 				#refが重複の場合、既存のself.map上のエントリの末尾に追加
-				self.map[identifier][ref]=self.map[identifier][ref]+"/"+e
+				self._setMap(identifier,ref,self.map[identifier][ref]+"/"+e)
 			else:
 				#self.mapに新規エントリとして追加
-				self.map[identifier][ref]=e
+				self._setMap(identifier,ref,e)
+
+			#Lookupに備えてself.keyIndexに追加
+			index.setdefault(chord,[]).append(ref)
 
 			#self.entriesに追加
 			#重複確認・置換処理の関係でNoneになってる場合には既に追加済みを意味するのでここでは何もしない
 			if entry:
 				self.entries[identifier].append(entry)
+		self._markChanged(identifier)
+		self._updateSearchIndex(identifier,ref)
+		if resolve:
+			self.resolveConfricts(identifier)
+		self._endEdit(started)
 		return
 
+	def remove(self,identifier,ref):
+		"""指定されたビューから、refに割り当てられた全てのショートカットキーを削除する"""
+		ref=ref.upper()
+		identifier=identifier.upper()
+		if ref not in self.map.get(identifier,{}):
+			return
+		started=self._beginEdit()
+		self._removeRefs(identifier,[ref])
+		self._endEdit(started)
+
+	def _removeRefs(self,identifier,refs):
+		"""指定されたビューから、refsに割り当てられた全てのショートカットキーを削除する。self.entriesの再構築は1回だけ行う"""
+		if identifier not in self.map:
+			return
+		index=self.keyIndex[identifier]
+		removed=set()
+		remains={}				#(flags,keycode)→そのキーに残るrefのリスト
+		for ref in refs:
+			keyString=self.map[identifier].get(ref)
+			if keyString is None:
+				continue
+			self._setMap(identifier,ref,None)
+			removed.add(ref)
+
+			#keyIndexから削除し、キーを共有していた残りのrefを調べる
+			for key in keyString.split("/"):
+				chord=keyToChord(key)
+				if ref not in index.get(chord,()):
+					continue
+				rest=list(dict.fromkeys(r for r in index[chord] if r!=ref))
+				if rest:
+					index[chord]=rest
+					remains[chord]=rest
+				else:
+					del index[chord]
+					remains.pop(chord,None)
+		if not removed:
+			return
+
+		entries=[]
+		for entry in self.entries[identifier]:
+			if entry.get_ref_name() in removed:
+				continue
+			chord=(entry.GetFlags(),entry.GetKeyCode())
+			if chord in remains:
+				refs=remains[chord]
+				cmd=self._getGroupRef(refs) if len(refs)>1 else menuItemsStore.get_ref(entry.get_ref_name())
+				if entry.GetCommand()!=cmd:
+					entry=AcceleratorEntry(chord[0],chord[1],cmd,entry.get_ref_name())
+			entries.append(entry)
+		self.entries[identifier]=entries
+		self._markChanged(identifier)
+		for ref in removed:
+			self._updateSearchIndex(identifier,ref)
+
+	def _setMap(self,identifier,ref,keyString):
+		"""self.mapを更新する。履歴の記録中であれば、変更前の値を記録する。keyStringがNoneの場合は削除する"""
+		if self._journal is not None and (identifier,ref) not in self._journal:
+			self._journal[(identifier,ref)]=self.map[identifier].get(ref)
+		if keyString is None:
+			del self.map[identifier][ref]
+		else:
+			self.map[identifier][ref]=keyString
+
+	def _beginEdit(self):
+		"""編集の記録を開始する。履歴が無効な場合や、既に記録中の場合はFalseを返す"""
+		if self.history is None or self._journal is not None:
+			return False
+		self._journal={}
+		return True
+
+	def _endEdit(self,started):
+		if started:
+			self.history.Record(self._journal)
+			self._journal=None
+
+	def _applyDelta(self,delta):
+		"""記録された変更前の状態に戻し、その操作を取り消すための情報を返す"""
+		self._journal={}
+		#先に全て削除してから追加しないと、戻す途中の状態で重複と判定されてしまう
+		#削除によるself.entriesの再構築と重複の解決は、refごとではなくビューごとに1回だけ行う
+		views={}
+		for identifier,ref in delta:
+			views.setdefault(identifier,[]).append(ref)
+		for identifier,refs in views.items():
+			self._removeRefs(identifier,refs)
+		for (identifier,ref),keyString in delta.items():
+			if keyString is not None:
+				self.add(identifier,ref,keyString,resolve=False)
+		for identifier in views:
+			self.resolveConfricts(identifier)
+		ret=self._journal
+		self._journal=None
+		return ret
+
+	def EnableHistory(self,depth=100):
+		"""
+			以降の編集について、元に戻す・やり直すための履歴の記録を開始する。
+			depthには、元に戻せる編集の最大数を指定する。現在の状態は保存済みの状態として扱う。
+		"""
+		self.history=KeymapHistory(depth)
+
+	def Undo(self):
+		"""直前の編集を元に戻す。戻せる編集が無い場合はFalseを返す"""
+		delta=self.history.PopUndo() if self.history else None
+		if delta is None:
+			return False
+		self.history.PushRedo(self._applyDelta(delta))
+		return True
+
+	def Redo(self):
+		"""元に戻した編集をやり直す。やり直せる編集が無い場合はFalseを返す"""
+		delta=self.history.PopRedo() if self.history else None
+		if delta is None:
+			return False
+		self.history.PushUndo(self._applyDelta(delta))
+		return True
+
+	def CanUndo(self):
+		return bool(self.history) and self.history.CanUndo()
+
+	def CanRedo(self):
+		return bool(self.history) and self.history.CanRedo()
+
+	def MarkSaved(self):
+		"""現在の状態を保存済みの状態として記録する。SaveFileに成功した場合は自動で呼ばれる"""
+		if self.history:
+			self.history.MarkSaved()
+
+	def IsModified(self):
+		"""保存済みの状態から変更されていればTrueを返す"""
+		return bool(self.history) and self.history.IsModified()
+
+	def RevertToSaved(self):
+		"""
+			保存済みの状態に戻す。
+			履歴の最大数を超えるなどして保存済みの状態まで辿れない場合はFalseを返す。
+		"""
+		steps=self.history.GetStepsToSaved() if self.history else None
+		if steps is None:
+			return False
+		for i in range(-steps):
+			self.Undo()
+		for i in range(steps):
+			self.Redo()
+		return True
+
+	def _markChanged(self,identifier):
+		"""ビューの割り当てが変更されたことを記録する"""
+		self.versions[identifier]=self.versions.get(identifier,0)+1
+
+	def resolveConfricts(self,identifier=None):
+		"""
+			保留されているキーの重複を、confrictPolicyに従ってまとめて解決する。
+			identifierを省略すると、全てのビューを処理する。
+		"""
+		if identifier is None:
+			identifiers=list(self._pendingConfricts)
+		else:
+			identifiers=[identifier.upper()]
+		started=self._beginEdit()
+		for identifier in identifiers:
+			chords=self._pendingConfricts.pop(identifier,None)
+			if chords:
+				self._resolveConfricts(identifier,chords)
+		self._endEdit(started)
+
+	def _resolveConfricts(self,identifier,chords):
+		index=self.keyIndex[identifier]
+		resolved={}				#(flags,keycode)→(残すrefのリスト,共有用のref または None)
+		for chord in chords:
+			refs=list(dict.fromkeys(index[chord]))
+			kept,denied=self.confrictPolicy.Resolve(refs) if len(refs)>1 else (refs,[])
+			for ref in refs:
+				removed=self._removeKey(identifier,ref,chord,ref in kept)
+				if removed and ref in denied:
+					self.addError(identifier,ref,"/".join(removed),"confrict")
+			index[chord]=kept
+			resolved[chord]=(kept,self._getGroupRef(kept) if len(kept)>1 else None)
+
+		#entriesを1回だけ走査して再構築する
+		entries=[]
+		done=set()
+		for entry in self.entries[identifier]:
+			chord=(entry.GetFlags(),entry.GetKeyCode())
+			if chord not in resolved:
+				entries.append(entry)
+				continue
+			kept,groupRef=resolved[chord]
+			ref=entry.get_ref_name()
+			if ref not in kept or (chord,ref) in done:
+				continue
+			done.add((chord,ref))
+			cmd=groupRef if groupRef else menuItemsStore.get_ref(ref)
+			if entry.GetCommand()!=cmd:
+				entry=AcceleratorEntry(chord[0],chord[1],cmd,ref)
+			entries.append(entry)
+		self.entries[identifier]=entries
+		self._markChanged(identifier)
+
+	def _removeKey(self,identifier,ref,chord,keepFirst):
+		"""
+			self.mapから、refに割り当てられたchordに一致するキー文字列を削除し、削除したもののリストを返す。
+			keepFirstがTrueの場合は、最初の1つだけを残す。
+		"""
+		keys=[]
+		removed=[]
+		for key in self.map[identifier][ref].split("/"):
+			if keyToChord(key)==chord and not keepFirst:
+				removed.append(key)
+				continue
+			if keyToChord(key)==chord:
+				keepFirst=False
+			keys.append(key)
+		if removed:
+			self._setMap(identifier,ref,"/".join(keys) if keys else None)
+			self._updateSearchIndex(identifier,ref)
+		return removed
+
+	def _updateSearchIndex(self,identifier,ref):
+		if self.searchIndex is not None:
+			self.searchIndex.Update(identifier,ref,self.map[identifier].get(ref))
+
+	def _getGroupRef(self,refs):
+		"""
+			キーを共有するrefのグループに対応するメニューのrefを取得する。
+			同じグループは、ビューやキー、refの登録順が異なっても同じrefを共有する。
+		"""
+		refs=sorted(refs)
+		newref=menuItemsStore.get_ref("keymap_"+"|".join(refs))
+		if newref not in self.refMap:
+			self.refMap[newref]=tuple(menuItemsStore.get_ref(ref) for ref in refs)
+		return newref
+
 	def addError(self,identifier,ref,key,reason=""):
 		"""エラー発生時、情報を記録する。"""
 		self.log.warning("Cannot add %s=%s in %s reason=%s" % (ref,key,identifier,reason))
@@ -231,18 +710,16 @@ class KeymapHandler():
 			items		重複したキーが設定されているAcceleratorEntryのリスト
 			identifier	itemsが設定されているウィンドウの識別名
 		"""
-		#keymap_keynameのrefを取得
-		newref=menuItemsStore.getRef("keymap_"+items[0].ToRawString())
-		self.refMap[newref]=[]
+		#キーを共有するrefのグループのrefを取得
+		newref=self._getGroupRef([i.get_ref_name() for i in items])
 
 		#self.entriesからいったん削除
 		for i in range(len(items)-1):
 			self.entries[identifier].remove(items[0])
 
-		#refを差し替えて再登録し、元のrefを記録
+		#refを差し替えて再登録する。元のrefは_getGroupRefでrefMapに記録済み
 		for i in items:
-			self.refMap[newref].append(i.GetCommand())
-			self.entries[identifier].append(AcceleratorEntry(i.GetFlags(),i.GetKeyCode(),newref,i.GetRefName()))
+			self.entries[identifier].append(AcceleratorEntry(i.GetFlags(),i.GetKeyCode(),newref,i.get_ref_name()))
 		return True
 
 	def isRefHit(self,ref):
@@ -262,7 +739,7 @@ def make_entry(ref,key,filter,log):
 		"SHIFT":wx.ACCEL_SHIFT
 	}
 
-	if filter and ("WINDOWS" in filter.modifier_key):
+	if filter and ("WINDOWS" in filter.modifierKey):
 		modifire_keys["WINDOWS"]=wx.MOD_WIN
 
 	flags=0
@@ -283,7 +760,7 @@ def make_entry(ref,key,filter,log):
 		return False
 
 	#フィルタの確認
-	if filter and not filter.check(key):
-		log.warning("%s(%s): %s" % (ref,key,filter.get_last_error()))
+	if filter and not filter.Check(key):
+		log.warning("%s(%s): %s" % (ref,key,filter.GetLastError()))
 		return False
-	return AcceleratorEntry(flags,str2key[codestr],menuItemsStore.getRef(ref.upper()),ref.upper())
+	return AcceleratorEntry(flags,str2key[codestr],menuItemsStore.get_ref(ref.upper()),ref.upper())
@@ -6,12 +6,15 @@
 
 import wx
 
+FIRST_REF=5000		#最初に割り当てるref
+
 class _MenuItemsStore(object):
 	"""このクラスは、外からインスタンス化してはいけません。"""
 
 	def __init__(self):
 		self.refs={}
-		self.next_id=5000
+		self.identifiers={}		#ref→文字列
+		self.next_id=FIRST_REF
 
 	def _getRef(self,identifier):
 		identifier=identifier.upper()
@@ -21,6 +24,7 @@ class _MenuItemsStore(object):
 			ref=self.next_id
 			self.next_id+=1
 			self.refs[identifier]=ref
+			self.identifiers[ref]=identifier
 		#end なかったから作った
 		return ref
 
@@ -29,3 +33,11 @@ _store=_MenuItemsStore()
 def get_ref(identifier):
 	"""文字列から、対応するメニューのrefを取得する。なかったら、作ってから帰す。"""
 	return _store._getRef(identifier)
+
+def get_identifier(ref):
+	"""refから、対応する文字列を取得する。存在しないrefの場合はNoneを返す。"""
+	return _store.identifiers.get(ref)
+
+def get_next_ref():
+	"""次に割り当てられるrefを返す"""
+	return _store.next_id
@@ -0,0 +1,150 @@
+# merge
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#旧デフォルト・新デフォルト・ユーザのキーマップの3方向マージ
+
+import configparser
+
+from .keyString import normalizeKey, splitKeyString, keyToChord
+from .converter import KeymapConverter
+
+# MergeConflict.kind
+BOTH_MODIFIED="bothModified"			#ユーザと新デフォルトの両方が、旧デフォルトから異なる変更をした
+CHORD_COLLISION="chordCollision"		#新デフォルトで変更されたキーが、ユーザが独自に割り当てたキーと重複した
+
+# 値の由来
+_SAME=0			#旧デフォルトから変更されていない、またはユーザと新デフォルトで同じ
+_NEW=1			#新デフォルトの変更を採用した
+_USER=2			#ユーザの変更を採用した
+
+
+class MergeConflict():
+	"""マージで自動的に解決できなかった、またはユーザの設定を優先して解決した箇所"""
+
+	def __init__(self,kind,identifier,ref,oldDefault,newDefault,user,key=None,otherRef=None):
+		self.kind=kind
+		self.identifier=identifier
+		self.ref=ref
+		self.oldDefault=oldDefault			#旧デフォルトのキー文字列。未割当ならNone
+		self.newDefault=newDefault			#新デフォルトのキー文字列。未割当ならNone
+		self.user=user						#ユーザのキー文字列。未割当ならNone
+		self.key=key						#CHORD_COLLISIONの場合、重複したため採用しなかった新デフォルトのキー
+		self.otherRef=otherRef				#CHORD_COLLISIONの場合、そのキーを割り当てているユーザのref
+
+	def __repr__(self):
+		return "<MergeConflict %s [%s] %s>" % (self.kind,self.identifier,self.ref)
+
+	def toDict(self):
+		return dict(self.__dict__)
+
+
+class MergeResult():
+	"""mergeの結果"""
+
+	def __init__(self):
+		self.keymap={}				#ビュー名→ref→キー文字列
+		self.conflicts=[]			#MergeConflictのリスト
+
+	def SaveFile(self,fileName):
+		"""KeymapHandler.SaveFileと同じ形式で書き出す"""
+		c=configparser.ConfigParser()
+		for identifier,refs in self.keymap.items():
+			c.add_section(identifier)
+			for ref,keyString in refs.items():
+				c[identifier][ref]=keyString
+		with open(fileName,"w",encoding="UTF-8") as f:
+			c.write(f)
+
+
+def loadKeymap(fileName,sections=None):
+	"""
+		KeymapHandler.addFileと同じ形式のファイルを、ビュー名→ref→キー文字列のdictとして読み込む。
+		KeymapHandlerと異なり、キーの妥当性や重複は確認しない。
+	"""
+	keymap={}
+	with open(fileName,encoding="UTF-8") as f:
+		for identifier,ref,key in KeymapConverter().ReadIni(f,sections):
+			refs=keymap.setdefault(identifier,{})
+			refs[ref]=refs[ref]+"/"+key if ref in refs else key
+	return keymap
+
+
+def _toKeymap(source):
+	"""KeymapHandler・ファイル名・dictのいずれかを、ビュー名→ref→キー文字列のdictに変換する"""
+	if isinstance(source,str):
+		return loadKeymap(source)
+	if hasattr(source,"map"):
+		return source.map
+	return {identifier.upper():{ref.upper():keyString for ref,keyString in refs.items()} for identifier,refs in source.items()}
+
+
+def _canon(keyString):
+	"""比較用に、キーの順序や表記の揺れを無視した値にする"""
+	if not keyString:
+		return None
+	return frozenset(normalizeKey(key) or key.upper() for key in splitKeyString(keyString)) or None
+
+
+def merge(oldDefault,newDefault,user):
+	"""
+		旧デフォルト・新デフォルト・ユーザのキーマップを3方向マージし、MergeResultを返す。
+		各引数には、KeymapHandler、addFileと同じ形式のファイル名、ビュー名→ref→キー文字列のdictのいずれかを指定できる。
+
+		ユーザが変更していないrefは新デフォルトの値を、新デフォルトで変更されていないrefはユーザの値を採用する。
+		両方が異なる変更をしている場合はユーザの値を採用し、BOTH_MODIFIEDとして記録する。
+		新デフォルトの変更で採用したキーが、同じビューでユーザが変更したrefのキーと重複する場合(AcceleratorEntryとして等しい場合)は、
+		新デフォルトのそのキーを採用せず、CHORD_COLLISIONとして記録する。
+		処理時間はバインドの総数に比例する。
+	"""
+	oldDefault=_toKeymap(oldDefault)
+	newDefault=_toKeymap(newDefault)
+	user=_toKeymap(user)
+	result=MergeResult()
+	for identifier in dict.fromkeys([*user,*newDefault,*oldDefault]):
+		o=oldDefault.get(identifier,{})
+		n=newDefault.get(identifier,{})
+		u=user.get(identifier,{})
+		merged={}
+		origin={}
+		for ref in dict.fromkeys([*u,*n,*o]):
+			ov,nv,uv=o.get(ref),n.get(ref),u.get(ref)
+			oc,nc,uc=_canon(ov),_canon(nv),_canon(uv)
+			if uc==oc:
+				value,src=nv,(_SAME if nc==oc else _NEW)
+			elif nc==oc or nc==uc:
+				value,src=uv,(_SAME if nc==uc else _USER)
+			else:
+				result.conflicts.append(MergeConflict(BOTH_MODIFIED,identifier,ref,ov,nv,uv))
+				value,src=uv,_USER
+			if value:
+				merged[ref]=value
+				origin[ref]=src
+
+		#キーの重複の確認
+		chords={}				#(flags,keycode)→[(ref,キー),...]
+		for ref,keyString in merged.items():
+			for key in splitKeyString(keyString):
+				chord=keyToChord(key)
+				if chord:
+					chords.setdefault(chord,[]).append((ref,key))
+		dropped={}				#ref→採用しないキーのリスト
+		for items in chords.values():
+			if len(items)<2:
+				continue
+			userRefs=[ref for ref,key in items if origin[ref]==_USER]
+			if not userRefs:
+				continue
+			for ref,key in items:
+				if origin[ref]==_NEW:
+					result.conflicts.append(MergeConflict(CHORD_COLLISION,identifier,ref,o.get(ref),n.get(ref),u.get(ref),key,userRefs[0]))
+					dropped.setdefault(ref,[]).append(key)
+		for ref,keys in dropped.items():
+			remains=[key for key in splitKeyString(merged[ref]) if key not in keys]
+			if remains:
+				merged[ref]="/".join(remains)
+			else:
+				del merged[ref]
+
+		if merged:
+			result.keymap[identifier]=merged
+	return result
@@ -0,0 +1,168 @@
+# searchIndex
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#コマンドパレット向けの、ref・ビュー名・キー文字列の検索用索引
+
+import bisect
+
+from .keyString import normalizeKey, splitKeyString
+
+
+class KeymapSearchIndex():
+	"""
+		(ビュー名,ref)を単位とする検索用の索引
+
+		検索結果は次の順に並ぶ。同じ順位の中では、括弧内の順となる。
+		1. キーが完全に一致(refの辞書順)
+		2. refが前方一致(完全一致を含む)(refの辞書順)
+		3. refを_で区切った2番目以降の単語が前方一致(単語、refの辞書順)
+		4. refが部分一致(refの辞書順)
+		5. キーが前方一致(キー、refの辞書順)
+		6. キーが部分一致(refの辞書順)
+		7. ビュー名が前方一致(ビュー名、refの辞書順)
+		8. ビュー名が部分一致(ビュー名、refの辞書順)
+		前方一致は整列済みのリストを二分探索し、部分一致はrefの辞書順に整列したtrigramの転置リストのうち最も短いものを先頭から調べる。
+		いずれも結果の順に候補を取り出すので、件数が満たされた時点で残りは調べない。
+	"""
+
+	def __init__(self):
+		self.docs={}				#(ビュー名,ref)→正規化したキー文字列のタプル
+		self.refs=[]				#(ref,ビュー名)の整列済みリスト
+		self.words=[]				#(refの2番目以降の単語,ref,ビュー名)の整列済みリスト
+		self.keys=[]				#(正規化したキー文字列,ref,ビュー名)の整列済みリスト
+		self.views={}				#ビュー名→refのset
+		self.refGrams={}			#refのtrigram→(ref,ビュー名)の整列済みリスト
+		self.keyGrams={}			#キー文字列のtrigram→(ref,ビュー名)の整列済みリスト
+		self.chords={}				#正規化したキー文字列→(ref,ビュー名)の整列済みリスト
+
+	def Build(self,keymap):
+		"""ビュー名→ref→キー文字列のdict(KeymapHandler.map)から索引を作り直す"""
+		self.__init__()
+		#(ref,ビュー名)の順に追加すれば、refsと転置リストは整列済みになる
+		for ref,identifier in sorted((ref,identifier) for identifier,refs in keymap.items() for ref in refs):
+			self._Add(identifier,ref,keymap[identifier][ref],list.append)
+		self.words.sort()
+		self.keys.sort()
+
+	def Update(self,identifier,ref,keyString):
+		"""refの割り当てを索引に反映する。keyStringがNoneの場合は索引から削除する"""
+		doc=(identifier,ref)
+		if doc in self.docs:
+			self._Remove(doc)
+		if keyString is not None:
+			self._Add(identifier,ref,keyString,bisect.insort)
+
+	def _Add(self,identifier,ref,keyString,insert):
+		doc=(identifier,ref)
+		keys=tuple(key for key in (normalizeKey(k) for k in splitKeyString(keyString)) if key)
+		self.docs[doc]=keys
+		self.views.setdefault(identifier,set()).add(ref)
+		insert(self.refs,(ref,identifier))
+		for word in self._Words(ref):
+			insert(self.words,(word,ref,identifier))
+		for key in keys:
+			insert(self.keys,(key,ref,identifier))
+		for key in set(keys):
+			insert(self.chords.setdefault(key,[]),(ref,identifier))
+		for gram in self._Grams(ref):
+			insert(self.refGrams.setdefault(gram,[]),(ref,identifier))
+		for gram in self._KeyGrams(keys):
+			insert(self.keyGrams.setdefault(gram,[]),(ref,identifier))
+
+	def _Remove(self,doc):
+		identifier,ref=doc
+		keys=self.docs.pop(doc)
+		self.views[identifier].discard(ref)
+		if not self.views[identifier]:
+			del self.views[identifier]
+		self._RemoveSorted(self.refs,(ref,identifier))
+		for word in self._Words(ref):
+			self._RemoveSorted(self.words,(word,ref,identifier))
+		for key in keys:
+			self._RemoveSorted(self.keys,(key,ref,identifier))
+		for key in set(keys):
+			self._Discard(self.chords,key,(ref,identifier))
+		for gram in self._Grams(ref):
+			self._Discard(self.refGrams,gram,(ref,identifier))
+		for gram in self._KeyGrams(keys):
+			self._Discard(self.keyGrams,gram,(ref,identifier))
+
+	def _RemoveSorted(self,items,item):
+		i=bisect.bisect_left(items,item)
+		if i<len(items) and items[i]==item:
+			del items[i]
+
+	def _Discard(self,index,name,item):
+		postings=index.get(name)
+		if postings is not None:
+			self._RemoveSorted(postings,item)
+			if not postings:
+				del index[name]
+
+	def _Words(self,ref):
+		return set(ref.split("_")[1:])-{""}
+
+	def _Grams(self,term):
+		return {term[i:i+3] for i in range(len(term)-2)}
+
+	def _KeyGrams(self,keys):
+		return set().union(*(self._Grams(key) for key in keys))
+
+	def Search(self,query,identifier=None,limit=20):
+		"""
+			queryに一致する(ビュー名,ref,キー文字列のタプル)のリストを、一致の度合いの高い順に最大limit件返す。
+			identifierを指定すると、そのビューのものに限定する。
+		"""
+		query=query.strip().upper()
+		results=[]
+		if not query or limit<=0:
+			return results
+		seen=set()
+
+		def emit(docs):
+			"""docsを順に結果に加え、件数が満たされたらTrueを返す"""
+			for doc in docs:
+				if (identifier and doc[0]!=identifier) or doc in seen:
+					continue
+				seen.add(doc)
+				results.append((doc[0],doc[1],self.docs[doc]))
+				if len(results)>=limit:
+					return True
+			return False
+
+		chord=normalizeKey(query)
+		if chord and emit((view,ref) for ref,view in self.chords.get(chord,())):
+			return results
+		if emit((view,ref) for ref,view in self._Prefix(self.refs,query)):
+			return results
+		if emit((view,ref) for word,ref,view in self._Prefix(self.words,query)):
+			return results
+		if emit(self._Substring(self.refGrams,query,identifier,lambda doc:query in doc[1])):
+			return results
+		if emit((view,ref) for key,ref,view in self._Prefix(self.keys,query)):
+			return results
+		if emit(self._Substring(self.keyGrams,query,identifier,lambda doc:any(query in key for key in self.docs[doc]))):
+			return results
+		views=sorted(self.views)
+		for view in [v for v in views if v.startswith(query)]+[v for v in views if query in v and not v.startswith(query)]:
+			if emit((view,ref) for ref in sorted(self.views[view])):
+				return results
+		return results
+
+	def _Prefix(self,items,query):
+		"""整列済みのリストから、先頭の要素がqueryで始まるものを順に返す"""
+		for i in range(bisect.bisect_left(items,(query,)),len(items)):
+			if not items[i][0].startswith(query):
+				return
+			yield items[i]
+
+	def _Substring(self,grams,query,identifier,match):
+		"""queryのtrigramの転置リストのうち最も短いものを先頭から調べ、matchを満たすものをrefの辞書順に返す。identifierを指定すると、そのビューのものに限定する"""
+		if len(query)<3:
+			return
+		postings=[grams.get(gram) for gram in self._Grams(query)]
+		if not all(postings):
+			return
+		for ref,view in min(postings,key=len):
+			if (not identifier or view==identifier) and match((view,ref)):
+				yield (view,ref)
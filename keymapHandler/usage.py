@@ -0,0 +1,104 @@
+# usage
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+#コマンドの利用回数の記録
+
+import array
+import heapq
+import json
+import logging
+import os
+
+from . import menuItemsStore
+
+
+class UsageCounter():
+	"""
+		ビューごとに、メニューのref(menuItemsStoreの番号)で添え字付けした配列でコマンドの実行回数を数える。
+		ファイルには、実行ごとに番号が変わりうるrefではなく、ビュー名→コマンド名→回数のJSONで保存する。
+	"""
+
+	def __init__(self,fileName=None,flushEvery=1000,log_prefix="app"):
+		"""
+			fileNameを指定すると、以前の記録を読み込み、flushEvery回の記録ごとにそのファイルへ書き出す。
+		"""
+		self.log=logging.getLogger("%s.usage" % log_prefix)
+		self.fileName=fileName
+		self.flushEvery=flushEvery
+		self.counts={}				#ビュー名→refからFIRST_REFを引いた値で添え字付けした回数の配列
+		self.totals={}				#ビュー名→コマンド名→書き出し済み・読み込み済みの回数
+		self._pending=0				#前回の書き出し以降に記録した回数
+		if fileName and os.path.exists(fileName):
+			try:
+				with open(fileName,encoding="UTF-8") as f:
+					self.totals=json.load(f)
+			except Exception as e:
+				self.log.warning("cannot load usage file %s. %s" % (fileName,str(e)))
+
+	def _Grow(self,identifier,index):
+		"""配列を、現在のrefの数よりも余裕を持たせた大きさで確保する"""
+		size=max(index+1,menuItemsStore.get_next_ref()-menuItemsStore.FIRST_REF)+256
+		counts=self.counts.get(identifier)
+		if counts is None:
+			counts=array.array("L",bytes(array.array("L").itemsize*size))
+		else:
+			counts.extend(array.array("L",bytes(counts.itemsize*(size-len(counts)))))
+		self.counts[identifier]=counts
+		return counts
+
+	def Record(self,identifier,ref):
+		"""identifierのビューで、メニューのrefのコマンドが実行されたことを記録する"""
+		index=ref-menuItemsStore.FIRST_REF
+		if index<0:
+			return
+		counts=self.counts.get(identifier)
+		if counts is None or index>=len(counts):
+			counts=self._Grow(identifier,index)
+		counts[index]+=1
+		self._pending+=1
+		if self._pending>=self.flushEvery and self.fileName:
+			self.Flush()
+
+	def Wrap(self,identifier,eventHandler,exclude=()):
+		"""
+			EVT_MENUのイベントハンドラを、実行回数を記録してから呼び出すように包む。
+			excludeに含まれるref(キーを共有するrefのグループのrefなど)は記録しない。
+		"""
+		record=self.Record
+		def handler(event):
+			if event.GetId() not in exclude:
+				record(identifier,event.GetId())
+			return eventHandler(event)
+		return handler
+
+	def _Merge(self):
+		"""配列の回数をtotalsに移し、配列をクリアする"""
+		for identifier,counts in self.counts.items():
+			totals=self.totals.setdefault(identifier,{})
+			for index,count in enumerate(counts):
+				if count:
+					name=menuItemsStore.get_identifier(index+menuItemsStore.FIRST_REF)
+					if name:
+						totals[name]=totals.get(name,0)+count
+			self.counts[identifier]=array.array("L",bytes(counts.itemsize*len(counts)))
+		self._pending=0
+
+	def Flush(self):
+		"""記録をファイルに書き出す。成功した場合はTrueを返す"""
+		self._Merge()
+		if not self.fileName:
+			return False
+		tmp=self.fileName+".tmp"
+		try:
+			with open(tmp,"w",encoding="UTF-8") as f:
+				json.dump(self.totals,f,ensure_ascii=False,separators=(",",":"))
+			os.replace(tmp,self.fileName)
+		except Exception as e:
+			self.log.warning("cannot save usage file %s. %s" % (self.fileName,str(e)))
+			return False
+		return True
+
+	def GetTop(self,identifier,n=10):
+		"""identifierのビューで実行回数の多いコマンドを、(コマンド名,回数)のリストで最大n件返す"""
+		self._Merge()
+		return heapq.nlargest(n,self.totals.get(identifier,{}).items(),key=lambda item:item[1])
@@ -0,0 +1,82 @@
+# test_confrictPolicy
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+import unittest
+
+from keymapHandler import KeymapHandler, ConfrictPolicy
+from keymapHandler.confrictPolicy import ALLOW
+from keymapHandler.keyString import keyToChord
+
+
+class TestResolve(unittest.TestCase):
+
+	def test_default_deny_keeps_first(self):
+		self.assertEqual(ConfrictPolicy().Resolve(["X","Y","Z"]),(["X"],["Y","Z"]))
+
+	def test_first_and_last_wins_are_silent(self):
+		self.assertEqual(ConfrictPolicy().FirstWins().Resolve(["X","Y"]),(["X"],[]))
+		self.assertEqual(ConfrictPolicy().LastWins().Resolve(["X","Y"]),(["Y"],[]))
+
+	def test_rule_must_cover_every_ref(self):
+		policy=ConfrictPolicy().LastWins(["x","y"])
+		self.assertEqual(policy.Resolve(["X","Y"]),(["Y"],[]))
+		self.assertEqual(policy.Resolve(["X","Z"]),(["X"],["Z"]))
+
+	def test_allow_shares_within_group(self):
+		self.assertEqual(ConfrictPolicy().Allow(["a","b"]).Resolve(["A","B"]),(["A","B"],[]))
+
+	def test_outsider_added_later_is_rejected(self):
+		self.assertEqual(ConfrictPolicy().Allow(["a","b"]).Resolve(["A","B","C"]),(["A","B"],["C"]))
+		self.assertEqual(ConfrictPolicy().Allow(["a","b"]).Resolve(["A","C","B"]),(["A","B"],["C"]))
+
+	def test_allow_does_not_evict_earlier_binding(self):
+		policy=ConfrictPolicy().Allow(["find","find_next"])
+		self.assertEqual(policy.Resolve(["SAVE","FIND"]),(["SAVE"],["FIND"]))
+		self.assertEqual(policy.Resolve(["SAVE","FIND","FIND_NEXT"]),(["SAVE"],["FIND","FIND_NEXT"]))
+
+	def test_last_wins_applies_between_group_and_outsider(self):
+		policy=ConfrictPolicy().Allow(["a","b"]).LastWins()
+		self.assertEqual(policy.Resolve(["A","C","B"]),(["A","B"],[]))
+		self.assertEqual(policy.Resolve(["A","B","C"]),(["C"],[]))
+
+	def test_separate_groups_do_not_share(self):
+		policy=ConfrictPolicy().Allow(["c","d"]).Allow(["a","b"])
+		self.assertEqual(policy.Resolve(["A","C","B","D"]),(["A","B"],["C","D"]))
+
+	def test_default_allow_shares_with_outsiders(self):
+		self.assertEqual(ConfrictPolicy(ALLOW).Allow(["a","b"]).Resolve(["C","A","B"]),(["C","A","B"],[]))
+
+	def test_wildcard_allow(self):
+		self.assertEqual(ConfrictPolicy().Allow(None).Resolve(["X","Y"]),(["X","Y"],[]))
+
+	def test_unknown_action(self):
+		with self.assertRaises(ValueError):
+			ConfrictPolicy(default=99)
+
+
+class TestHandlerPolicy(unittest.TestCase):
+
+	def test_group_survives_outsider(self):
+		handler=KeymapHandler({"main":{"a":"ctrl+a","b":"ctrl+a"}},confrictPolicy=ConfrictPolicy().Allow(["a","b"]))
+		handler.add("main","c","ctrl+a")
+		self.assertEqual(handler.map["MAIN"],{"A":"ctrl+a","B":"ctrl+a"})
+		self.assertEqual(handler.GetError("main"),{"C":"ctrl+a"})
+		commands={entry.GetCommand() for entry in handler.GetEntries("main")}
+		self.assertEqual(len(commands),1)
+		self.assertTrue(handler.isRefHit(commands.pop()))
+
+	def test_new_group_member_does_not_evict(self):
+		handler=KeymapHandler({"main":{"save":"ctrl+s"}},confrictPolicy=ConfrictPolicy().Allow(["find","find_next"]))
+		handler.add("main","find","ctrl+s")
+		self.assertEqual(handler.map["MAIN"],{"SAVE":"ctrl+s"})
+		self.assertEqual(handler.GetError("main"),{"FIND":"ctrl+s"})
+
+	def test_section_is_resolved_in_bulk(self):
+		handler=KeymapHandler({"main":{"c":"ctrl+a","a":"ctrl+a","b":"ctrl+a/ctrl+b"}},confrictPolicy=ConfrictPolicy().Allow(["a","b"]))
+		self.assertEqual(handler.map["MAIN"],{"C":"ctrl+a","B":"ctrl+b"})
+		self.assertEqual(handler.Lookup("main",*keyToChord("ctrl+a")),("C",))
+		self.assertEqual(handler.GetError("main"),{"A":"ctrl+a","B":"ctrl+a"})
+
+
+if __name__=="__main__":
+	unittest.main()
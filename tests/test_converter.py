@@ -0,0 +1,70 @@
+# test_converter
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+import io
+import random
+import unittest
+
+from keymapHandler import KeymapConverter
+from keymapHandler import converter
+
+
+def bindings(count,seed=1):
+	rnd=random.Random(seed)
+	keys=["CTRL+%s" % c for c in "ABCDEFGHIJ"]+["ALT+F%d" % i for i in range(1,13)]
+	return [(rnd.choice(["MAIN","SUB","EDIT"]),"REF%03d" % rnd.randrange(200),rnd.choice(keys)) for i in range(count)]
+
+
+class RunCounter(KeymapConverter):
+	"""WriteIniが同時に持った一時ファイルの最大数を記録する"""
+
+	def __init__(self,*pArgs,**kArgs):
+		super().__init__(*pArgs,**kArgs)
+		self.maxRuns=0
+
+	def _AddRun(self,runs,items):
+		super()._AddRun(runs,items)
+		self.maxRuns=max(self.maxRuns,len(runs))
+
+
+class TestWriteIni(unittest.TestCase):
+
+	def write(self,items,runSize=100000,conv=None):
+		conv=conv or KeymapConverter()
+		f=io.StringIO()
+		conv.WriteIni(iter(items),f,runSize)
+		return f.getvalue()
+
+	def test_order(self):
+		items=[("SUB","B","CTRL+B"),("MAIN","B","CTRL+X"),("SUB","A","CTRL+A"),("SUB","B","ALT+B"),("MAIN","A","CTRL+Y")]
+		#ビューは最初に現れた順、refは辞書順、同じrefのキーは現れた順
+		self.assertEqual(self.write(items),"[SUB]\na = CTRL+A\nb = CTRL+B/ALT+B\n\n[MAIN]\na = CTRL+Y\nb = CTRL+X\n\n")
+
+	def test_external_sort_matches_in_memory(self):
+		items=bindings(5000)
+		conv=RunCounter()
+		self.assertEqual(self.write(items,runSize=37,conv=conv),self.write(items))
+		#5000/37件で_maxRunsを超えるので、途中で併合されている
+		self.assertGreater(len(items)//37,converter._maxRuns)
+		self.assertLessEqual(conv.maxRuns,converter._maxRuns-1)
+
+	def test_round_trip(self):
+		items=bindings(3000,seed=2)
+		text=self.write(items,runSize=100)
+		conv=KeymapConverter()
+		expected=sorted(dict.fromkeys(items))
+		self.assertEqual(sorted(dict.fromkeys(conv.ReadIni(io.StringIO(text)))),expected)
+		self.assertEqual(conv.skipped,0)
+
+	def test_slash_and_invalid_keys_are_skipped(self):
+		conv=KeymapConverter()
+		text=self.write([("MAIN","A","CTRL+/"),("MAIN","A","CTRL+A"),("MAIN","B","NOT_A_KEY"),("MAIN","C","/")],conv=conv)
+		self.assertEqual(text,"[MAIN]\na = CTRL+A\n\n")
+		self.assertEqual(conv.skipped,3)
+
+	def test_empty(self):
+		self.assertEqual(self.write([]),"")
+
+
+if __name__=="__main__":
+	unittest.main()
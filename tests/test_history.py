@@ -0,0 +1,115 @@
+# test_history
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+import copy
+import unittest
+
+from keymapHandler import KeymapHandler, ConfrictPolicy
+
+
+def snapshot(handler):
+	"""比較用に、割り当ての状態を複製する"""
+	entries={identifier:sorted((e.GetFlags(),e.GetKeyCode(),e.GetCommand(),e.get_ref_name()) for e in items) for identifier,items in handler.entries.items() if items}
+	#元に戻したrefは登録順の末尾に戻るので、keyIndexのrefの並びは比較しない
+	keyIndex={identifier:{chord:sorted(refs) for chord,refs in index.items() if refs} for identifier,index in handler.keyIndex.items()}
+	keyIndex={identifier:index for identifier,index in keyIndex.items() if index}
+	return ({identifier:dict(refs) for identifier,refs in handler.map.items() if refs},entries,keyIndex)
+
+
+class TestHistory(unittest.TestCase):
+
+	def setUp(self):
+		self.handler=KeymapHandler({"main":{"save":"ctrl+s","open":"ctrl+o/f3"},"sub":{"close":"ctrl+w"}},confrictPolicy=ConfrictPolicy().Allow(["find","find_next"]))
+		self.handler.EnableHistory()
+
+	def roundTrip(self,*edits):
+		"""editsを順に適用し、全て元に戻す・やり直すと各段階の状態が復元されることを確かめる"""
+		states=[snapshot(self.handler)]
+		for edit in edits:
+			edit()
+			states.append(snapshot(self.handler))
+		for state in reversed(states[:-1]):
+			self.assertTrue(self.handler.Undo())
+			self.assertEqual(snapshot(self.handler),state)
+		self.assertFalse(self.handler.Undo())
+		for state in states[1:]:
+			self.assertTrue(self.handler.Redo())
+			self.assertEqual(snapshot(self.handler),state)
+		self.assertFalse(self.handler.Redo())
+
+	def test_add_and_remove(self):
+		self.roundTrip(
+			lambda:self.handler.add("main","close","ctrl+w"),
+			lambda:self.handler.remove("main","open"),
+			lambda:self.handler.add("sub","open","ctrl+o"),
+		)
+
+	def test_shared_keys(self):
+		self.roundTrip(
+			lambda:self.handler.add("main","find","ctrl+f"),
+			lambda:self.handler.add("main","find_next","ctrl+f/f3"),
+			lambda:self.handler.remove("main","find"),
+		)
+
+	def test_addDict_over_existing_view(self):
+		self.roundTrip(
+			lambda:self.handler.addDict({"main":{"save":"ctrl+shift+s","quit":"alt+f4"},"new":{"run":"f5"}}),
+		)
+		#ビューの置き換えは1回の操作として記録される
+		self.assertEqual(self.handler.map["MAIN"],{"SAVE":"ctrl+shift+s","QUIT":"alt+f4"})
+		self.handler.Undo()
+		self.assertEqual(self.handler.map["MAIN"],{"SAVE":"ctrl+s","OPEN":"ctrl+o/f3"})
+		self.assertFalse(self.handler.CanUndo())
+
+	def test_new_edit_clears_redo(self):
+		self.handler.add("main","close","ctrl+w")
+		self.handler.Undo()
+		self.assertTrue(self.handler.CanRedo())
+		self.handler.add("main","quit","alt+f4")
+		self.assertFalse(self.handler.CanRedo())
+
+	def test_modified_and_revert(self):
+		self.assertFalse(self.handler.IsModified())
+		saved=snapshot(self.handler)
+		self.handler.add("main","close","ctrl+w")
+		self.assertTrue(self.handler.IsModified())
+		self.handler.Undo()
+		self.assertFalse(self.handler.IsModified())
+		self.handler.Redo()
+		self.handler.remove("main","save")
+		self.assertTrue(self.handler.RevertToSaved())
+		self.assertFalse(self.handler.IsModified())
+		self.assertEqual(snapshot(self.handler),saved)
+
+	def test_revert_after_undo_past_saved(self):
+		self.handler.add("main","close","ctrl+w")
+		self.handler.MarkSaved()
+		saved=snapshot(self.handler)
+		self.handler.Undo()
+		self.assertTrue(self.handler.IsModified())
+		self.assertTrue(self.handler.RevertToSaved())
+		self.assertEqual(snapshot(self.handler),saved)
+
+	def test_depth(self):
+		handler=KeymapHandler({"main":{"save":"ctrl+s"}})
+		handler.EnableHistory(depth=2)
+		for key in ("f1","f2","f3"):
+			handler.add("main","help_"+key,key)
+		self.assertTrue(handler.Undo())
+		self.assertTrue(handler.Undo())
+		self.assertFalse(handler.Undo())
+		self.assertIn("HELP_F1",handler.map["MAIN"])
+		#保存済みの状態まで辿れない
+		self.assertTrue(handler.IsModified())
+		self.assertFalse(handler.RevertToSaved())
+
+	def test_disabled(self):
+		handler=KeymapHandler({"main":{"save":"ctrl+s"}})
+		handler.add("main","open","ctrl+o")
+		self.assertFalse(handler.CanUndo())
+		self.assertFalse(handler.Undo())
+		self.assertFalse(handler.IsModified())
+
+
+if __name__=="__main__":
+	unittest.main()
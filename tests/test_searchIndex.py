@@ -0,0 +1,95 @@
+# test_searchIndex
+#Copyright (C) 2019-2025 yamahubuki <itiro.ishino@gmail.com>
+
+import random
+import unittest
+
+from keymapHandler import KeymapHandler, KeymapSearchIndex
+
+
+KEYMAP={
+	"MAIN":{"FILE_SAVE":"ctrl+shift+s/F12","SAVE_AS":"ctrl+k","UP":"alt+uparrow","CLOSE":"ctrl+w"},
+	"SUB":{"SEARCH":"ctrl+k","SAVED_LIST":"alt+s"},
+}
+
+
+def refs(results):
+	return [(view,ref) for view,ref,keys in results]
+
+
+class TestSearch(unittest.TestCase):
+
+	def setUp(self):
+		self.index=KeymapSearchIndex()
+		self.index.Build(KEYMAP)
+
+	def test_exact_key_comes_first(self):
+		self.assertEqual(refs(self.index.Search("ctrl+k")),[("MAIN","SAVE_AS"),("SUB","SEARCH")])
+
+	def test_tiers(self):
+		#refの前方一致、2番目以降の単語の前方一致、部分一致の順
+		self.assertEqual(refs(self.index.Search("save")),[("SUB","SAVED_LIST"),("MAIN","SAVE_AS"),("MAIN","FILE_SAVE")])
+		self.assertEqual(refs(self.index.Search("ave")),[("MAIN","FILE_SAVE"),("SUB","SAVED_LIST"),("MAIN","SAVE_AS")])
+
+	def test_key_prefix_and_substring(self):
+		self.assertEqual(refs(self.index.Search("ctrl+sh")),[("MAIN","FILE_SAVE")])
+		self.assertEqual(refs(self.index.Search("uparrow")),[("MAIN","UP")])
+
+	def test_view_name(self):
+		self.assertEqual(refs(self.index.Search("sub")),[("SUB","SAVED_LIST"),("SUB","SEARCH")])
+
+	def test_identifier_and_limit(self):
+		self.assertEqual(refs(self.index.Search("save",identifier="SUB")),[("SUB","SAVED_LIST")])
+		self.assertEqual(len(self.index.Search("a",limit=2)),2)
+		self.assertEqual(self.index.Search("save",limit=0),[])
+
+	def test_keys_are_normalized(self):
+		self.assertEqual(self.index.Search("file_save"),[("MAIN","FILE_SAVE",("CTRL+SHIFT+S","F12"))])
+
+	def test_update_matches_rebuild(self):
+		rnd=random.Random(1)
+		words=["FILE","EDIT","SAVE","OPEN","LINE"]
+		keymap={}
+		index=KeymapSearchIndex()
+		index.Build({})
+		for i in range(2000):
+			view="V%d" % rnd.randrange(3)
+			ref="%s_%s%d" % (rnd.choice(words),rnd.choice(words),rnd.randrange(30))
+			if rnd.random()<0.3:
+				if ref in keymap.get(view,{}):
+					del keymap[view][ref]
+					index.Update(view,ref,None)
+				continue
+			keyString="/".join(rnd.choice(["CTRL+","ALT+"])+rnd.choice("ABC") for j in range(rnd.randint(1,3)))
+			keymap.setdefault(view,{})[ref]=keyString
+			index.Update(view,ref,keyString)
+		rebuilt=KeymapSearchIndex()
+		rebuilt.Build(keymap)
+		for name in ("docs","refs","words","keys","views","refGrams","keyGrams","chords"):
+			self.assertEqual(getattr(index,name),getattr(rebuilt,name),name)
+		for query in ("ctrl+a","file","ILE_","LT+B","v1"):
+			self.assertEqual(index.Search(query,limit=50),rebuilt.Search(query,limit=50),query)
+
+
+class TestHandlerSearch(unittest.TestCase):
+
+	def test_index_follows_edits(self):
+		handler=KeymapHandler({"main":{"save":"ctrl+s"}})
+		handler.BuildSearchIndex()
+		handler.add("main","save_as","ctrl+shift+s")
+		self.assertEqual(refs(handler.Search("save")),[("MAIN","SAVE"),("MAIN","SAVE_AS")])
+		handler.remove("main","save")
+		self.assertEqual(refs(handler.Search("save")),[("MAIN","SAVE_AS")])
+		self.assertEqual(refs(handler.Search("ctrl+s")),[("MAIN","SAVE_AS")])
+
+	def test_index_follows_undo(self):
+		handler=KeymapHandler({"main":{"save":"ctrl+s"}})
+		handler.EnableHistory()
+		handler.add("main","open","ctrl+o")
+		self.assertEqual(refs(handler.Search("open")),[("MAIN","OPEN")])
+		handler.Undo()
+		self.assertEqual(handler.Search("open"),[])
+
+
+if __name__=="__main__":
+	unittest.main()